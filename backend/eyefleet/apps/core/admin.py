@@ -0,0 +1,5 @@
+from django.contrib import admin
+from eyefleet.apps.core.models.solves import SolveRecord
+
+# Register your models here.
+admin.site.register(SolveRecord)
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = 'eyefleet.apps.core'
+
+    def ready(self):
+        from django.apps import apps
+        from .versions import track_versions
+
+        # Version every eyefleet table so cached data follows its changes
+        track_versions(*[
+            model for model in apps.get_models()
+            if model.__module__.startswith('eyefleet.')
+        ])
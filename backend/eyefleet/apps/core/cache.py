@@ -0,0 +1,188 @@
+import functools
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable
+
+from django.core.cache import cache
+
+from eyefleet.apps.core.routers import use_replica
+from eyefleet.apps.core.versions import table_version
+
+logger = logging.getLogger(__name__)
+
+# Namespaces this process has already added to the shared registry
+_registered_namespaces = set()
+
+NAMESPACES_KEY = 'cache-metrics:namespaces'
+
+# Hits and misses are counted in memory and added to the shared counters
+# after this many accesses or seconds, so a cache hit costs no extra round trip
+METRICS_FLUSH_EVERY = 100
+METRICS_FLUSH_SECONDS = 10
+
+_pending_counts = Counter()
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+# Stored values are wrapped so a cached None is still a hit
+_MISSING = object()
+
+
+def namespace_for(model) -> str:
+    """The cache namespace of a model, e.g. 'maintenance.asset'"""
+    return model._meta.label_lower
+
+
+def _metric_key(namespace: str, kind: str) -> str:
+    return f'cache-metrics:{namespace}:{kind}'
+
+
+def _register_namespace(namespace: str):
+    if namespace in _registered_namespaces:
+        return
+    namespaces = cache.get(NAMESPACES_KEY, [])
+    if namespace not in namespaces:
+        cache.set(NAMESPACES_KEY, sorted(set(namespaces) | {namespace}), None)
+    _registered_namespaces.add(namespace)
+
+
+def record_access(namespace: str, hit: bool):
+    """Count a hit or miss; counts reach the shared totals in batches"""
+    with _pending_lock:
+        _pending_counts[(namespace, 'hits' if hit else 'misses')] += 1
+        due = (
+            sum(_pending_counts.values()) >= METRICS_FLUSH_EVERY or
+            time.monotonic() - _last_flush >= METRICS_FLUSH_SECONDS
+        )
+    if due:
+        flush_metrics()
+
+
+def flush_metrics():
+    """Add this process's pending hit and miss counts to the shared totals"""
+    global _last_flush
+    with _pending_lock:
+        pending = dict(_pending_counts)
+        _pending_counts.clear()
+        _last_flush = time.monotonic()
+
+    # Metrics must never break a cached read
+    try:
+        for (namespace, kind), count in pending.items():
+            _register_namespace(namespace)
+            key = _metric_key(namespace, kind)
+            if not cache.add(key, count, None):
+                try:
+                    cache.incr(key, count)
+                except ValueError:
+                    cache.set(key, count, None)
+    except Exception:
+        logger.exception("Failed to flush cache metrics")
+
+
+def cache_metrics() -> Dict[str, Dict[str, Any]]:
+    """Hits, misses and hit rate per namespace
+
+    Other workers' latest counts show up once they flush (see METRICS_FLUSH_SECONDS).
+    """
+    flush_metrics()
+    namespaces = cache.get(NAMESPACES_KEY, [])
+    keys = [_metric_key(namespace, kind) for namespace in namespaces for kind in ('hits', 'misses')]
+    counts = cache.get_many(keys)
+
+    metrics = {}
+    for namespace in namespaces:
+        hits = counts.get(_metric_key(namespace, 'hits'), 0)
+        misses = counts.get(_metric_key(namespace, 'misses'), 0)
+        metrics[namespace] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None
+        }
+    return metrics
+
+
+def reset_cache_metrics():
+    with _pending_lock:
+        _pending_counts.clear()
+    namespaces = cache.get(NAMESPACES_KEY, [])
+    cache.delete_many([_metric_key(namespace, kind) for namespace in namespaces for kind in ('hits', 'misses')])
+
+
+class VersionedCache:
+    """Cache entries in one namespace that go stale when their tables change
+
+    Keys embed the current version of every model the entry depends on, so
+    a save or delete anywhere in those tables (see versions.py) makes the
+    old entries unreachable; they simply expire.
+    """
+
+    def __init__(self, namespace: str, models: Iterable, timeout: int = 300):
+        self.namespace = namespace
+        self.models = list(models)
+        self.timeout = timeout
+
+    def key(self, *parts) -> str:
+        versions = '.'.join(str(table_version(model)[0]) for model in self.models)
+        digest = hashlib.md5(repr(parts).encode()).hexdigest()
+        return f'{self.namespace}:{versions}:{digest}'
+
+    def get(self, *parts, default=None):
+        return self.get_at(self.key(*parts), default)
+
+    def set(self, value, *parts):
+        self.set_at(self.key(*parts), value)
+
+    # Callers that read, build and then store should compute the key once
+    # and use these, so a write in between can't file old data under the
+    # new version
+    def get_at(self, key: str, default=None):
+        value = cache.get(key, _MISSING)
+        record_access(self.namespace, value is not _MISSING)
+        return default if value is _MISSING else value[0]
+
+    def set_at(self, key: str, value):
+        cache.set(key, (value,), self.timeout)
+
+    def get_or_set(self, build: Callable[[], Any], *parts, cache_if: Callable[[Any], bool] = None):
+        """The cached value, or build() stored unless cache_if rejects it"""
+        key = self.key(*parts)
+        value = cache.get(key, _MISSING)
+        record_access(self.namespace, value is not _MISSING)
+        if value is not _MISSING:
+            return value[0]
+        # A lagging replica could fill the entry with rows older than its version
+        with use_replica(False):
+            result = build()
+        if cache_if is None or cache_if(result):
+            cache.set(key, (result,), self.timeout)
+        return result
+
+
+def cached_query(*models, timeout: int = 300, namespace: str = None, cache_if: Callable[[Any], bool] = None):
+    """Cache a function's result until any of the given models changes
+
+    For module-level and static functions whose arguments have a stable
+    repr (ids, strings, numbers); bound methods would key on the instance.
+    Results `cache_if` returns False for (e.g. errors) are not stored.
+
+        @cached_query(Asset, Maintenance)
+        def asset_history(asset_id): ...
+    """
+    def decorator(func):
+        store = VersionedCache(
+            namespace or f'{namespace_for(models[0])}:{func.__qualname__}',
+            models,
+            timeout
+        )
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return store.get_or_set(lambda: func(*args, **kwargs), args, sorted(kwargs.items()), cache_if=cache_if)
+
+        wrapper.cache = store
+        return wrapper
+    return decorator
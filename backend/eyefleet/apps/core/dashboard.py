@@ -0,0 +1,146 @@
+from datetime import timedelta
+
+from django.db.models import Avg, Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from eyefleet.apps.core.cache import cached_query
+from eyefleet.apps.maintenance.models import Asset, Inspection, Maintenance
+from eyefleet.apps.scheduling.models import Trip
+
+# KPIs are cheap to recompute, so keep them briefly even if nothing changes
+DASHBOARD_TTL = 60
+
+
+def _rate(part, whole):
+    return round(part / whole, 4) if whole else None
+
+
+def _money(value):
+    return round(float(value or 0), 2)
+
+
+def _month_start(months_back: int):
+    """Midnight on the first day of the month `months_back` months ago"""
+    moment = timezone.localtime().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(months_back):
+        moment = (moment - timedelta(days=1)).replace(day=1)
+    return moment
+
+
+@cached_query(Asset, timeout=DASHBOARD_TTL, namespace='dashboard:assets')
+def asset_kpis():
+    """Fleet size, assets per status and average fuel level"""
+    totals = Asset.objects.aggregate(
+        total=Count('pk'),
+        on_trip=Count('pk', filter=Q(on_trip=True)),
+        average_fuel_level=Avg('fuel_level')
+    )
+    by_status = Asset.objects.order_by().values('status').annotate(count=Count('pk'))
+    by_type = Asset.objects.order_by().values('type').annotate(count=Count('pk'))
+
+    return {
+        'total': totals['total'],
+        'on_trip': totals['on_trip'],
+        'average_fuel_level': round(totals['average_fuel_level'], 1) if totals['average_fuel_level'] is not None else None,
+        'by_status': {row['status'] or 'unknown': row['count'] for row in by_status},
+        'by_type': {row['type'] or 'unknown': row['count'] for row in by_type},
+    }
+
+
+@cached_query(Maintenance, timeout=DASHBOARD_TTL, namespace='dashboard:maintenance')
+def maintenance_kpis(months: int = 12):
+    """Jobs per status and estimated cost per month over the last `months` months"""
+    money = DecimalField(max_digits=12, decimal_places=2)
+    per_month = (
+        Maintenance.objects
+        .filter(scheduled_date__gte=_month_start(months - 1))
+        .annotate(month=TruncMonth('scheduled_date'))
+        .order_by()
+        .values('month')
+        .annotate(
+            jobs=Count('pk'),
+            estimated_cost=Sum('estimated_cost'),
+            additional_costs=Sum(Coalesce('additional_costs', Value(0), output_field=money))
+        )
+        .order_by('month')
+    )
+    by_status = Maintenance.objects.order_by().values('status').annotate(count=Count('pk'))
+    by_priority = Maintenance.objects.order_by().values('priority').annotate(count=Count('pk'))
+
+    return {
+        'by_status': {row['status']: row['count'] for row in by_status},
+        'by_priority': {row['priority']: row['count'] for row in by_priority},
+        'cost_per_month': [
+            {
+                'month': row['month'].date().isoformat(),
+                'jobs': row['jobs'],
+                'estimated_cost': _money(row['estimated_cost']),
+                'additional_costs': _money(row['additional_costs']),
+                'total_cost': _money((row['estimated_cost'] or 0) + (row['additional_costs'] or 0)),
+            }
+            for row in per_month
+        ],
+    }
+
+
+@cached_query(Inspection, timeout=DASHBOARD_TTL, namespace='dashboard:inspections')
+def inspection_kpis(months: int = 12):
+    """Pass rates of completed inspections, overall and per inspection type
+
+    An inspection passes when it was completed with no findings.
+    """
+    completed = Q(status='completed')
+    passed = completed & Q(findings=[])
+    inspections = Inspection.objects.filter(timestamp__gte=_month_start(months - 1))
+
+    totals = inspections.aggregate(
+        total=Count('pk'),
+        completed=Count('pk', filter=completed),
+        passed=Count('pk', filter=passed)
+    )
+    by_type = (
+        inspections.order_by().values('type')
+        .annotate(completed=Count('pk', filter=completed), passed=Count('pk', filter=passed))
+    )
+    overdue = Inspection.objects.filter(next_inspection__lt=timezone.now()).count()
+
+    return {
+        'total': totals['total'],
+        'completed': totals['completed'],
+        'passed': totals['passed'],
+        'pass_rate': _rate(totals['passed'], totals['completed']),
+        'overdue': overdue,
+        'by_type': {
+            row['type']: {
+                'completed': row['completed'],
+                'passed': row['passed'],
+                'pass_rate': _rate(row['passed'], row['completed'])
+            }
+            for row in by_type
+        },
+    }
+
+
+@cached_query(Trip, timeout=DASHBOARD_TTL, namespace='dashboard:trips')
+def trip_kpis(days: int = 30):
+    """Trip counts per status and on-time percentage over the last `days` days"""
+    trips = Trip.objects.filter(start_time__gte=timezone.now() - timedelta(days=days))
+    finished = Q(status='completed')
+
+    totals = trips.aggregate(
+        total=Count('pk'),
+        completed=Count('pk', filter=finished),
+        on_time=Count('pk', filter=finished & Q(on_time=True)),
+        average_progress=Avg('progress', filter=Q(status='ongoing'))
+    )
+    by_status = trips.order_by().values('status').annotate(count=Count('pk'))
+
+    return {
+        'total': totals['total'],
+        'completed': totals['completed'],
+        'on_time': totals['on_time'],
+        'on_time_rate': _rate(totals['on_time'], totals['completed']),
+        'average_progress': round(totals['average_progress'], 1) if totals['average_progress'] is not None else None,
+        'by_status': {row['status']: row['count'] for row in by_status},
+    }
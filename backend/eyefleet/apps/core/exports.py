@@ -0,0 +1,127 @@
+import csv
+import io
+import json
+import zlib
+from itertools import islice
+from typing import AsyncIterator, Iterable, Iterator, Sequence
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+# Rows fetched per database round trip while exporting
+EXPORT_CHUNK_SIZE = 2000
+
+# Flush compressed output roughly this often so clients see steady progress
+FLUSH_BYTES = 64 * 1024
+
+# Encoded chunks pulled per thread hop when streaming under ASGI
+ASYNC_BATCH_SIZE = 64
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def csv_lines(columns: Sequence[str], rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """Encode rows as CSV, one line at a time, header first"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        writer.writerow(values)
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text.encode()
+
+    yield line(columns)
+    for row in rows:
+        yield line([_csv_value(value) for value in row])
+
+
+def ndjson_lines(columns: Sequence[str], rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """Encode rows as one JSON object per line"""
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield (encoder.encode(dict(zip(columns, row))) + '\n').encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Gzip a byte stream incrementally, so memory stays flat however long it runs"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    pending = 0
+    for chunk in chunks:
+        output = compressor.compress(chunk)
+        pending += len(chunk)
+        if pending >= FLUSH_BYTES:
+            output += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if output:
+            yield output
+    yield compressor.flush()
+
+
+async def async_chunks(chunks: Iterable[bytes], batch_size: int = ASYNC_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """Stream a sync iterator from an async context a batch at a time
+
+    Under ASGI, Django reads a sync streaming body with sync_to_async(list),
+    i.e. the whole export in memory before the first byte is sent. Pulling
+    small batches keeps it streaming. The batches run thread-sensitive, so a
+    queryset iterator keeps using the same database connection.
+    """
+    iterator = iter(chunks)
+    next_batch = sync_to_async(lambda: list(islice(iterator, batch_size)), thread_sensitive=True)
+    try:
+        while True:
+            batch = await next_batch()
+            if not batch:
+                return
+            for chunk in batch:
+                yield chunk
+    finally:
+        # Release cursors and clients promptly if the client disconnects
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=True)()
+
+
+def export_response(request, columns: Sequence[str], rows: Iterable[Sequence],
+                    filename: str, file_format: str = 'csv') -> StreamingHttpResponse:
+    """Stream rows to the client as CSV or NDJSON, gzipped if the client accepts it
+
+    `rows` should be lazy (e.g. a queryset iterator) so nothing is held
+    in memory beyond the current chunk.
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f'Unknown export format {file_format!r}; use one of {", ".join(EXPORT_FORMATS)}')
+    content_type, extension = EXPORT_FORMATS[file_format]
+
+    lines = csv_lines(columns, rows) if file_format == 'csv' else ndjson_lines(columns, rows)
+    compress = 'gzip' in request.headers.get('Accept-Encoding', '')
+
+    body = gzip_chunks(lines) if compress else lines
+    # DRF's Request wraps Django's; ASGI servers need an async body to stream
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        body = async_chunks(body)
+
+    response = StreamingHttpResponse(body, content_type=content_type)
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    response['Vary'] = 'Accept-Encoding'
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    # Let proxies pass chunks through instead of buffering the whole export
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,80 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import RelatedField
+
+# Serializer fields whose output differs from the raw column value
+CONVERTED_FIELDS = (
+    serializers.DateTimeField,
+    serializers.DateField,
+    serializers.TimeField,
+    serializers.DecimalField,
+    serializers.DurationField,
+    serializers.UUIDField,
+)
+
+
+class RowMapper:
+    """Turns .values() rows into the same dicts a ModelSerializer would produce
+
+    Built once per serializer: each output key knows its column and, for
+    dates, decimals and UUIDs, the serializer field that formats it. Every
+    other value is passed through as the database returned it.
+    """
+
+    def __init__(self, columns: List[str], mappings: List[Tuple[str, str, Optional[Callable]]]):
+        self.columns = columns
+        self.mappings = mappings
+
+    def map_row(self, row: Dict) -> Dict:
+        data = {}
+        for key, column, convert in self.mappings:
+            value = row[column]
+            data[key] = convert(value) if convert is not None and value is not None else value
+        return data
+
+    def map_rows(self, rows: Iterable[Dict]) -> List[Dict]:
+        return [self.map_row(row) for row in rows]
+
+
+def build_row_mapper(serializer, model, extra_columns: Iterable[str] = ()) -> Optional[RowMapper]:
+    """A RowMapper for a serializer, or None if it needs model instances
+
+    Nested serializers, many-to-many fields, method fields and computed
+    sources can't be read from a single row, so those serializers are left
+    on the normal path.
+    """
+    mappings = []
+    columns = {model._meta.pk.name}
+    columns.update(extra_columns)
+
+    for key, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField,
+                              serializers.SerializerMethodField, serializers.FileField)):
+            return None
+        if field.source == '*' or '.' in field.source:
+            return None
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete or model_field.many_to_many:
+            return None
+
+        # Foreign keys come back from .values() as their raw id
+        if isinstance(field, RelatedField):
+            if not isinstance(field, serializers.PrimaryKeyRelatedField) or field.pk_field is not None:
+                return None
+            convert = None
+        elif isinstance(field, CONVERTED_FIELDS):
+            convert = field.to_representation
+        else:
+            convert = None
+
+        columns.add(model_field.name)
+        mappings.append((key, model_field.name, convert))
+
+    return RowMapper(sorted(columns), mappings)
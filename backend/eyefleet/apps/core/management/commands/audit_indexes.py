@@ -0,0 +1,199 @@
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from eyefleet.apps.maintenance.models import Asset, Inspection, Maintenance
+from eyefleet.apps.maintenance.models.assets import AVAILABLE_STATUS
+from eyefleet.apps.scheduling.models import Cargo, Mission, MissionSchedule, Trip
+
+# List endpoints the frontend polls
+DEFAULT_PATHS = [
+    '/api/livetracking/devices/',
+    '/api/livetracking/indicators/',
+    '/api/maintenance/assets/',
+    '/api/maintenance/maintenance/',
+    '/api/maintenance/inspections/',
+    '/api/scheduling/missions/',
+    '/api/scheduling/mission-schedules/',
+    '/api/scheduling/trips/',
+    '/api/scheduling/cargos/',
+]
+
+# "table"."column" as Django quotes it in generated SQL, optionally wrapped
+# in a function such as UPPER(...) for case-insensitive lookups
+COLUMN_PATTERN = re.compile(r'(?:(\w+)\()?"(\w+)"\."(\w+)"')
+
+# Expressions in an index definition, e.g. upper((status)::text) on PostgreSQL
+INDEX_EXPRESSION_PATTERN = re.compile(r'(\w+)\(\(*"?(\w+)"?')
+
+CLAUSE_END = re.compile(r' (GROUP BY|ORDER BY|LIMIT|OFFSET|HAVING) ')
+
+
+def hot_queries():
+    """The ORM queries the schedulers, agents and signals run most often
+
+    These use the same predicates as the code that runs them, so an index
+    the real query can't use isn't reported as covering it.
+    """
+    now = timezone.now()
+    asset = Asset.objects.first()
+    mission = Mission.objects.first()
+    schedule = MissionSchedule.objects.first()
+
+    yield MissionSchedule.objects.filter(status__in=['scheduled', 'in_progress'], next_occurrence__lte=now)
+    yield Maintenance.objects.filter(ref_asset=asset).order_by('-scheduled_date')
+    yield Inspection.objects.filter(ref_asset=asset).order_by('-timestamp')
+    yield Asset.objects.filter(AVAILABLE_STATUS)
+    yield Asset.objects.filter(
+        AVAILABLE_STATUS,
+        location__isnull=False,
+        capacity_weight__isnull=False,
+        capacity_volume__isnull=False
+    )
+    yield Cargo.objects.filter(mission=mission)
+    yield Trip.objects.filter(reference_schedule=schedule, schedule_occurrence__isnull=False)
+    yield Trip.objects.filter(vehicle=asset, status__in=['scheduled', 'ongoing'], end_time__gte=now)
+
+
+def split_clauses(sql):
+    """The WHERE and ORDER BY parts of a SELECT"""
+    where, order = '', ''
+    if ' WHERE ' in sql:
+        where = sql.split(' WHERE ', 1)[1]
+        match = CLAUSE_END.search(where)
+        if match:
+            where = where[:match.start()]
+    if ' ORDER BY ' in sql:
+        order = sql.rsplit(' ORDER BY ', 1)[1]
+        match = CLAUSE_END.search(order)
+        if match:
+            order = order[:match.start()]
+    return where, order
+
+
+class Command(BaseCommand):
+    help = 'Record the queries hot endpoints and jobs run and report filters no index supports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS,
+                            help='API paths to GET while recording queries')
+        parser.add_argument('--explain', action='store_true',
+                            help='Also print the query plan of every unsupported query')
+
+    def handle(self, *args, **options):
+        with CaptureQueriesContext(connection) as captured:
+            self.run_paths(options['paths'])
+            for queryset in hot_queries():
+                list(queryset)
+
+        selects = [query['sql'] for query in captured.captured_queries if query['sql'].lstrip().upper().startswith('SELECT')]
+        self.stdout.write(f'Recorded {len(selects)} SELECT queries')
+
+        usage = self.collect_usage(selects)
+        indexes = self.existing_indexes(usage)
+
+        missing = 0
+        for (table, filtered, ordered), queries in sorted(usage.items()):
+            covered = self.covered(indexes.get(table, []), filtered, ordered)
+            if covered:
+                continue
+            missing += 1
+            suggestion = list(filtered) + [column for column in ordered if column not in filtered]
+            self.stdout.write(self.style.WARNING(
+                f'{table}: filter on {", ".join(filtered) or "-"}, '
+                f'order by {", ".join(ordered) or "-"} '
+                f'({len(queries)} queries) - consider an index on ({", ".join(suggestion)})'
+            ))
+            if options['explain']:
+                self.explain(queries[0])
+
+        if not missing:
+            self.stdout.write(self.style.SUCCESS('Every recorded filter has a supporting index'))
+
+    def run_paths(self, paths):
+        host = next((host for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost').lstrip('.')
+        client = Client(HTTP_HOST=host)
+        for path in paths:
+            response = client.get(path)
+            if response.status_code != 200:
+                self.stdout.write(self.style.ERROR(f'GET {path} returned {response.status_code}'))
+
+    def collect_usage(self, selects):
+        """Group queries by table and the columns they filter and sort on"""
+        usage = defaultdict(list)
+        for sql in selects:
+            where, order = split_clauses(sql)
+            filtered, ordered = defaultdict(list), defaultdict(list)
+            for table, column in self.columns_in(where):
+                if column not in filtered[table]:
+                    filtered[table].append(column)
+            for table, column in self.columns_in(order):
+                if column not in ordered[table]:
+                    ordered[table].append(column)
+            for table in set(filtered) | set(ordered):
+                usage[(table, tuple(filtered[table]), tuple(ordered[table]))].append(sql)
+        return usage
+
+    @staticmethod
+    def columns_in(clause):
+        """(table, column) pairs in a clause; wrapped columns read e.g. upper(status)"""
+        for function, table, column in COLUMN_PATTERN.findall(clause):
+            yield table, f'{function.lower()}({column})' if function else column
+
+    def existing_indexes(self, usage):
+        """Column lists of every index on the tables seen, in index order"""
+        indexes = {}
+        with connection.cursor() as cursor:
+            for table in {table for table, _, _ in usage}:
+                constraints = connection.introspection.get_constraints(cursor, table)
+                indexes[table] = [
+                    self.index_columns(constraint) for constraint in constraints.values()
+                    if constraint['index'] or constraint['unique'] or constraint['primary_key']
+                ]
+        return indexes
+
+    @staticmethod
+    def index_columns(constraint):
+        """An index's columns, with expressions written like columns_in() writes them"""
+        columns = [column for column in constraint['columns'] or [] if column]
+        if columns:
+            return columns
+        # Expression indexes have no plain columns; PostgreSQL reports their definition
+        definition = constraint.get('definition') or ''
+        return [
+            f'{function.lower()}({column})'
+            for function, column in INDEX_EXPRESSION_PATTERN.findall(definition)
+            if function.lower() not in ('btree', 'hash', 'gin', 'gist', 'brin')
+        ]
+
+    @staticmethod
+    def covered(indexes, filtered, ordered):
+        """Whether some index leads with a filtered column (or the sort column) and also holds the sort column"""
+        leading = filtered or ordered[:1]
+        if not leading:
+            return True
+        for columns in indexes:
+            if not columns or columns[0] not in leading:
+                continue
+            # Without the sort column the database still sorts every match
+            if ordered and ordered[0] not in columns:
+                continue
+            return True
+        return False
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+            try:
+                cursor.execute(prefix + sql)
+            except Exception as e:
+                self.stdout.write(f'    could not explain: {e}')
+                return
+            for row in cursor.fetchall():
+                self.stdout.write('    ' + ' '.join(str(value) for value in row))
@@ -0,0 +1,14 @@
+from eyefleet.apps.core.routers import use_replica
+
+
+class ReplicaReadMiddleware:
+    """Serve GET and HEAD requests (lists, reports, detail pages) from the read replica"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD'):
+            with use_replica():
+                return self.get_response(request)
+        return self.get_response(request)
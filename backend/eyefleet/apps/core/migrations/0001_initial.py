@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolveRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('OPTIMAL', 'Optimal'), ('FEASIBLE', 'Feasible'), ('INFEASIBLE', 'Infeasible'), ('MODEL_INVALID', 'Model Invalid'), ('UNKNOWN', 'Unknown')], max_length=20)),
+                ('num_variables', models.PositiveIntegerField()),
+                ('num_constraints', models.PositiveIntegerField()),
+                ('num_workers', models.PositiveIntegerField()),
+                ('time_limit', models.FloatField(blank=True, null=True)),
+                ('relative_gap', models.FloatField(blank=True, null=True)),
+                ('wall_time', models.FloatField(help_text='Seconds spent in the solver')),
+                ('objective', models.FloatField(blank=True, null=True)),
+                ('best_bound', models.FloatField(blank=True, null=True)),
+                ('num_branches', models.PositiveBigIntegerField(default=0)),
+                ('num_conflicts', models.PositiveBigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'solve_records',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['name', 'created_at'], name='solve_record_name_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,6 @@
+from .solves import SolveRecord, SOLVE_STATUS_CHOICES
+
+__all__ = [
+    'SolveRecord',
+    'SOLVE_STATUS_CHOICES',
+]
@@ -0,0 +1,44 @@
+from django.db import models
+
+# Define CP-SAT solve status choices
+SOLVE_STATUS_CHOICES = [
+    ('OPTIMAL', 'Optimal'),
+    ('FEASIBLE', 'Feasible'),
+    ('INFEASIBLE', 'Infeasible'),
+    ('MODEL_INVALID', 'Model Invalid'),
+    ('UNKNOWN', 'Unknown')
+]
+
+class SolveRecord(models.Model):
+    """Metrics for a single CP-SAT solve, used to tune and capacity-plan optimizations"""
+    # which optimizer ran, e.g. 'mission_schedule' or 'maintenance_interval'
+    name = models.CharField(max_length=100)
+    status = models.CharField(max_length=20, choices=SOLVE_STATUS_CHOICES)
+
+    # model size
+    num_variables = models.PositiveIntegerField()
+    num_constraints = models.PositiveIntegerField()
+
+    # solver configuration
+    num_workers = models.PositiveIntegerField()
+    time_limit = models.FloatField(null=True, blank=True)
+    relative_gap = models.FloatField(null=True, blank=True)
+
+    # results
+    wall_time = models.FloatField(help_text="Seconds spent in the solver")
+    objective = models.FloatField(null=True, blank=True)
+    best_bound = models.FloatField(null=True, blank=True)
+    num_branches = models.PositiveBigIntegerField(default=0)
+    num_conflicts = models.PositiveBigIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'solve_records'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['name', 'created_at'], name='solve_record_name_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}-{self.status}-{self.wall_time:.2f}s"
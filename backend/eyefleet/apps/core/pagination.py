@@ -0,0 +1,35 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """Default pagination for every list endpoint
+
+    Keyset pagination on the primary key: each page is an indexed range scan
+    from the cursor, so the cost of a page doesn't grow with the table the
+    way OFFSET does. Viewsets can set `cursor_ordering` to page on another indexed,
+    unchanging column.
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = '-pk'
+
+    def get_ordering(self, request, queryset, view):
+        # Let viewsets choose their own indexed ordering
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering:
+            return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+        return super().get_ordering(request, queryset, view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.pk_name = queryset.model._meta.pk.name
+        return super().paginate_queryset(queryset, request, view)
+
+    def _get_position_from_instance(self, instance, ordering):
+        # Rows from .values() are dicts keyed by the real primary key name
+        if isinstance(instance, dict):
+            field_name = ordering[0].lstrip('-')
+            if field_name == 'pk':
+                field_name = self.pk_name
+            return str(instance[field_name])
+        return super()._get_position_from_instance(instance, ordering)
@@ -0,0 +1,62 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+from eyefleet.apps.core.versions import last_modified
+
+REPLICA_DATABASE = 'replica'
+
+# Tables written to within this many seconds are read from the primary,
+# since the replica may not have caught up yet
+REPLICA_MAX_LAG = getattr(settings, 'REPLICA_MAX_LAG', 5)
+
+# Whether reads in the current request, task or thread may use the replica
+_use_replica = ContextVar('use_replica', default=False)
+
+
+@contextmanager
+def use_replica(enabled: bool = True):
+    """Send reads inside the block to the read replica, if one is configured
+
+    Works as a decorator too. Writes always go to the primary, and so do
+    reads inside a transaction, so code can still read its own writes.
+    use_replica(False) pins reads to the primary, e.g. while filling a cache
+    whose key is a table version the replica may not have caught up to.
+    """
+    token = _use_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReplicaRouter:
+    """Reads go to the replica inside use_replica(); everything else to the primary
+
+    Reads of a table that changed within REPLICA_MAX_LAG seconds also go to
+    the primary, so a lagging replica can't serve rows older than the
+    table's current version.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _use_replica.get() or REPLICA_DATABASE not in settings.DATABASES:
+            return 'default'
+        if connections['default'].in_atomic_block:
+            return 'default'
+        modified = last_modified(model)
+        if modified is None or time.time() - modified < REPLICA_MAX_LAG:
+            return 'default'
+        return REPLICA_DATABASE
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
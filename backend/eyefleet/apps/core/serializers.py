@@ -0,0 +1,8 @@
+from rest_framework import serializers
+from eyefleet.apps.core.models import SolveRecord
+
+
+class SolveRecordSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SolveRecord
+        fields = '__all__'
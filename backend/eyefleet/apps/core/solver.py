@@ -0,0 +1,88 @@
+import logging
+import os
+
+from django.conf import settings
+from ortools.sat.python import cp_model
+
+from eyefleet.apps.core.models import SolveRecord
+
+logger = logging.getLogger(__name__)
+
+# Defaults for every CP-SAT solve, overridable per optimizer
+SOLVER_SETTINGS = getattr(settings, 'CP_SAT_SOLVER', {})
+
+
+def default_num_workers() -> int:
+    """Search workers to use, sized to the host's cores unless configured"""
+    configured = SOLVER_SETTINGS.get('num_search_workers')
+    if configured:
+        return configured
+    # CP-SAT's portfolio gains little beyond 8 workers
+    return max(1, min(os.cpu_count() or 1, 8))
+
+
+class SolverService:
+    """Configures CP-SAT the same way for every optimizer and records each solve
+
+    Callers use `solver` for reading values back, exactly as they would a
+    plain CpSolver, but solve through `solve()` so metrics are persisted.
+    """
+
+    def __init__(self, name: str, time_limit: float = None, relative_gap: float = None,
+                 num_workers: int = None, log_search: bool = None):
+        self.name = name
+        self.solver = cp_model.CpSolver()
+
+        self.num_workers = num_workers or default_num_workers()
+        self.time_limit = time_limit if time_limit is not None else SOLVER_SETTINGS.get('max_time_in_seconds')
+        self.relative_gap = relative_gap if relative_gap is not None else SOLVER_SETTINGS.get('relative_gap_limit')
+        if log_search is None:
+            log_search = SOLVER_SETTINGS.get('log_search_progress', False)
+
+        parameters = self.solver.parameters
+        parameters.num_search_workers = self.num_workers
+        if self.time_limit:
+            parameters.max_time_in_seconds = self.time_limit
+        if self.relative_gap:
+            parameters.relative_gap_limit = self.relative_gap
+        if log_search:
+            # Send the search log to Django's logging instead of stdout
+            parameters.log_search_progress = True
+            parameters.log_to_stdout = False
+            self.solver.log_callback = self._log
+
+    def set_time_limit(self, seconds: float):
+        self.time_limit = seconds
+        self.solver.parameters.max_time_in_seconds = seconds
+
+    def solve(self, model: cp_model.CpModel, callback: cp_model.CpSolverSolutionCallback = None):
+        """Solve the model and record how it went"""
+        status = self.solver.Solve(model, callback)
+        self._record(model, status)
+        return status
+
+    def _record(self, model: cp_model.CpModel, status):
+        # Telemetry must never break an optimization
+        try:
+            proto = model.Proto()
+            found = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+            has_objective = found and model.HasObjective()
+            SolveRecord.objects.create(
+                name=self.name,
+                status=self.solver.StatusName(status),
+                num_variables=len(proto.variables),
+                num_constraints=len(proto.constraints),
+                num_workers=self.num_workers,
+                time_limit=self.time_limit,
+                relative_gap=self.relative_gap,
+                wall_time=self.solver.WallTime(),
+                objective=self.solver.ObjectiveValue() if has_objective else None,
+                best_bound=self.solver.BestObjectiveBound() if has_objective else None,
+                num_branches=self.solver.NumBranches(),
+                num_conflicts=self.solver.NumConflicts()
+            )
+        except Exception:
+            logger.exception("Failed to record %s solve", self.name)
+
+    def _log(self, message: str):
+        logger.info("[%s] %s", self.name, message)
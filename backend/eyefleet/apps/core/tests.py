@@ -0,0 +1,51 @@
+import gzip
+
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from django.test.client import AsyncRequestFactory
+
+from eyefleet.apps.core.exports import export_response
+
+
+class ExportResponseTests(SimpleTestCase):
+    columns = ['id', 'name']
+
+    def rows(self, consumed, count=10000):
+        for number in range(count):
+            consumed.append(number)
+            yield (number, f'row {number}')
+
+    async def test_streams_incrementally_under_asgi(self):
+        consumed = []
+        request = AsyncRequestFactory().get('/export/')
+        response = export_response(request, self.columns, self.rows(consumed), 'rows')
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertTrue(response.is_async)
+
+        # The first chunk goes out long before every row has been read
+        chunks = response.__aiter__()
+        first = await chunks.__anext__()
+        self.assertEqual(first, b'id,name\r\n')
+        self.assertLess(len(consumed), 1000)
+
+        body = first + b''.join([chunk async for chunk in chunks])
+        self.assertEqual(len(consumed), 10000)
+        self.assertEqual(body.count(b'\r\n'), 10001)
+
+    async def test_gzip_streams_under_asgi(self):
+        consumed = []
+        request = AsyncRequestFactory().get('/export/', headers={'Accept-Encoding': 'gzip'})
+        response = export_response(request, self.columns, self.rows(consumed), 'rows', 'ndjson')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = b''.join([chunk async for chunk in response])
+        self.assertEqual(gzip.decompress(body).count(b'\n'), 10000)
+
+    def test_sync_iterator_under_wsgi(self):
+        consumed = []
+        request = RequestFactory().get('/export/')
+        response = export_response(request, self.columns, self.rows(consumed, 3), 'rows')
+
+        self.assertFalse(response.is_async)
+        self.assertEqual(b''.join(response.streaming_content), b'id,name\r\n0,row 0\r\n1,row 1\r\n2,row 2\r\n')
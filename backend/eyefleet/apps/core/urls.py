@@ -0,0 +1,18 @@
+from rest_framework.routers import DefaultRouter
+from django.urls import path, include
+from eyefleet.apps.core.viewsets import SolveRecordViewSet, CacheMetricsViewSet, DashboardViewSet
+
+router = DefaultRouter()
+
+# Optimization telemetry routes
+router.register(r'solves', SolveRecordViewSet)
+
+# Shared cache hit/miss metrics
+router.register(r'cache-metrics', CacheMetricsViewSet, basename='cache-metrics')
+
+# Fleet KPI dashboard
+router.register(r'dashboard', DashboardViewSet, basename='dashboard')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
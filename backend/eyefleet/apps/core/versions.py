@@ -0,0 +1,101 @@
+import logging
+import time
+from typing import Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+logger = logging.getLogger(__name__)
+
+
+def _version_key(model) -> str:
+    return f'table-version:{model._meta.label_lower}'
+
+
+def _modified_key(model) -> str:
+    return f'table-modified:{model._meta.label_lower}'
+
+
+def table_version(model) -> Tuple[int, float]:
+    """The table's current version and when it last changed, from the cache only
+
+    A table nobody has written to since the cache was emptied starts at a
+    version based on the current time, so it never repeats an ETag
+    handed out before the flush.
+    """
+    keys = (_version_key(model), _modified_key(model))
+    values = cache.get_many(keys)
+    if keys[0] in values and keys[1] in values:
+        return values[keys[0]], values[keys[1]]
+
+    now = time.time()
+    cache.add(keys[0], int(now * 1000), None)
+    cache.add(keys[1], now, None)
+    values = cache.get_many(keys)
+    return values.get(keys[0], int(now * 1000)), values.get(keys[1], now)
+
+
+def last_modified(model):
+    """When the table last changed, or None if the cache can't be read
+
+    A table not seen since the cache was emptied counts as changed now.
+    """
+    try:
+        return table_version(model)[1]
+    except Exception:
+        logger.exception("Failed to read when %s last changed", model._meta.label_lower)
+        return None
+
+
+def _bump_now(model):
+    # A cache outage must not make writes fail; entries then just expire on their TTL
+    try:
+        version, _ = table_version(model)
+        try:
+            cache.incr(_version_key(model))
+        except ValueError:
+            # The key expired between reading and incrementing
+            cache.set(_version_key(model), version + 1, None)
+        cache.set(_modified_key(model), time.time(), None)
+    except Exception:
+        logger.exception("Failed to bump the table version of %s", model._meta.label_lower)
+
+
+def bump_table_version(model, using: str = None):
+    """Mark the table as changed for every process sharing the cache
+
+    The bump waits for the current transaction to commit, so no reader can
+    cache uncommitted data under the new version. Outside a transaction it
+    happens straight away.
+    """
+    transaction.on_commit(lambda: _bump_now(model), using=using)
+
+
+def _bump_on_change(sender, using=None, **kwargs):
+    bump_table_version(sender, using)
+
+
+def _bump_on_m2m_change(sender, instance, model, action, using=None, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        # Both sides of the relation now serialize differently
+        for changed in {sender, type(instance), model}:
+            bump_table_version(changed, using)
+
+
+def track_versions(*models):
+    """Bump a table's version whenever one of its rows or many-to-many links change
+
+    Queryset .update() and bulk writes don't send signals; code using
+    them on a tracked table should call bump_table_version itself.
+    """
+    for model in models:
+        uid = f'table-version:{model._meta.label_lower}'
+        post_save.connect(_bump_on_change, sender=model, dispatch_uid=uid, weak=False)
+        post_delete.connect(_bump_on_change, sender=model, dispatch_uid=uid, weak=False)
+        for field in model._meta.local_many_to_many:
+            through = field.remote_field.through
+            m2m_changed.connect(
+                _bump_on_m2m_change, sender=through,
+                dispatch_uid=f'table-version:{through._meta.label_lower}', weak=False
+            )
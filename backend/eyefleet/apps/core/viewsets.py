@@ -0,0 +1,108 @@
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Avg, Count, Max
+from eyefleet.apps.core.models import SolveRecord
+from eyefleet.apps.core.serializers import SolveRecordSerializer
+from eyefleet.apps.core.mixins import QueryPlanMixin, SparseFieldsMixin
+from eyefleet.apps.core.cache import cache_metrics, reset_cache_metrics
+from eyefleet.apps.core.dashboard import (
+    DASHBOARD_TTL,
+    asset_kpis,
+    inspection_kpis,
+    maintenance_kpis,
+    trip_kpis
+)
+
+
+class SolveRecordViewSet(QueryPlanMixin, SparseFieldsMixin, viewsets.ReadOnlyModelViewSet):
+    """Per-solve CP-SAT metrics for every optimizer"""
+    queryset = SolveRecord.objects.all()
+    serializer_class = SolveRecordSerializer
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['name', 'status', 'num_workers']
+    ordering_fields = ['created_at', 'wall_time', 'num_variables']
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """Aggregate solve counts, sizes and times per optimizer"""
+        summary = (
+            self.filter_queryset(self.get_queryset())
+            .order_by()
+            .values('name')
+            .annotate(
+                solves=Count('id'),
+                avg_wall_time=Avg('wall_time'),
+                max_wall_time=Max('wall_time'),
+                avg_variables=Avg('num_variables'),
+                max_variables=Max('num_variables'),
+                avg_constraints=Avg('num_constraints')
+            )
+            .order_by('name')
+        )
+        return Response(list(summary))
+
+
+class CacheMetricsViewSet(viewsets.ViewSet):
+    """Hit and miss counts of the shared cache, per namespace"""
+
+    def list(self, request):
+        return Response(cache_metrics())
+
+    @action(detail=False, methods=['post'])
+    def reset(self, request):
+        try:
+            reset_cache_metrics()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class DashboardViewSet(viewsets.ViewSet):
+    """Fleet KPIs computed with database aggregates
+
+    Each section is cached for a minute and recomputed as soon as any of
+    its tables is written to. `months` (1-36) sets the window for
+    maintenance and inspections, `days` (1-365) the one for trips.
+    """
+
+    def list(self, request):
+        """Every section in one response"""
+        return self._respond(request, lambda months, days: {
+            'assets': asset_kpis(),
+            'maintenance': maintenance_kpis(months=months),
+            'inspections': inspection_kpis(months=months),
+            'trips': trip_kpis(days=days),
+        })
+
+    @action(detail=False, methods=['get'])
+    def assets(self, request):
+        return self._respond(request, lambda months, days: asset_kpis())
+
+    @action(detail=False, methods=['get'])
+    def maintenance(self, request):
+        return self._respond(request, lambda months, days: maintenance_kpis(months=months))
+
+    @action(detail=False, methods=['get'])
+    def inspections(self, request):
+        return self._respond(request, lambda months, days: inspection_kpis(months=months))
+
+    @action(detail=False, methods=['get'])
+    def trips(self, request):
+        return self._respond(request, lambda months, days: trip_kpis(days=days))
+
+    def _respond(self, request, compute):
+        try:
+            months = int(request.query_params.get('months', 12))
+            days = int(request.query_params.get('days', 30))
+            if not 1 <= months <= 36 or not 1 <= days <= 365:
+                raise ValueError('months must be 1-36 and days 1-365')
+
+            response = Response(compute(months, days))
+            response['Cache-Control'] = f'private, max-age={DASHBOARD_TTL}'
+            return response
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1,4 +1,5 @@
 from typing import Dict, Any
+from eyefleet.apps.core.routers import use_replica
 from .agents import LivetrackingAgents
 
 class LivetrackingAIService:
@@ -15,7 +16,9 @@ class LivetrackingAIService:
         """
         print("--- making query to server ----")
         try:
-            result = self.agents.query(message)
+            # Agent tools mostly read, so let them use the replica
+            with use_replica():
+                result = self.agents.query(message)
             return result
         except Exception as e:
             return {
@@ -0,0 +1,57 @@
+import json
+from datetime import datetime, timezone as dt_timezone
+from typing import Iterable, Iterator, Tuple
+
+from django.conf import settings
+from influxdb_client import InfluxDBClient
+
+TELEMETRY_COLUMNS = ['time', 'device_id', 'indicator', 'field', 'value', 'unit']
+
+
+def bucket_for(device_id: str) -> str:
+    """The Influx bucket a device's telemetry is written to"""
+    return device_id.replace(" ", "").lower()
+
+
+def _flux_time(moment: datetime) -> str:
+    return moment.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def telemetry_query(device_id: str, start: datetime, stop: datetime, indicators: Iterable[str] = ()) -> str:
+    """Flux query for a device's raw telemetry between start and stop"""
+    query = f'''
+    from(bucket: {json.dumps(bucket_for(device_id))})
+        |> range(start: time(v: "{_flux_time(start)}"), stop: time(v: "{_flux_time(stop)}"))
+    '''
+    indicators = list(indicators)
+    if indicators:
+        query += f'''    |> filter(fn: (r) => contains(value: r._measurement, set: {json.dumps(indicators)}))
+    '''
+    return query
+
+
+def telemetry_rows(device_id: str, start: datetime, stop: datetime,
+                   indicators: Iterable[str] = ()) -> Iterator[Tuple]:
+    """Yield telemetry rows as Influx streams them, without loading the range
+
+    Rows are ordered by time within each indicator. The client is opened
+    lazily and closed once the stream is exhausted or abandoned.
+    """
+    client = InfluxDBClient(
+        url=settings.INFLUXDB_URL,
+        token=settings.INFLUXDB_TOKEN,
+        org=settings.INFLUXDB_ORG
+    )
+    try:
+        records = client.query_api().query_stream(telemetry_query(device_id, start, stop, indicators))
+        for record in records:
+            yield (
+                record.get_time(),
+                device_id,
+                record.get_measurement(),
+                record.get_field(),
+                record.get_value(),
+                record.values.get('unit')
+            )
+    finally:
+        client.close()
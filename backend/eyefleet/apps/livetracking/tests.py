@@ -0,0 +1,56 @@
+import json
+
+from rest_framework.renderers import JSONRenderer
+from django.test import TestCase
+
+from eyefleet.apps.livetracking.models.devices import Device
+from eyefleet.apps.livetracking.serializers import DeviceSerializer
+
+
+def add_devices(count):
+    for number in range(count):
+        Device.objects.create(
+            name=f'device {number}', ip_address=f'10.0.0.{number + 1}', device_type='gps',
+            firmware_version='1.0', battery_level=number, location={'lat': 1.5, 'lng': number}
+        )
+
+
+class DeviceListQueryTests(TestCase):
+    url = '/api/livetracking/devices/'
+
+    def test_list_queries_stay_constant(self):
+        for query in ('', '?fields=id,name,status'):
+            with self.subTest(query=query):
+                add_devices(1)
+                with self.assertNumQueries(1):
+                    self.client.get(self.url + query)
+                add_devices(20)
+                with self.assertNumQueries(1):
+                    self.client.get(self.url + query)
+
+
+class DeviceFastListParityTests(TestCase):
+    url = '/api/livetracking/devices/'
+
+    def setUp(self):
+        add_devices(5)
+        Device.objects.create(name='bare', ip_address='::1', device_type='obd', firmware_version='2.0', last_pinged=None)
+
+    def expected(self, fields=None):
+        # What the plain ModelSerializer and JSONRenderer would send
+        data = DeviceSerializer(Device.objects.order_by('-pk'), many=True).data
+        rows = json.loads(JSONRenderer().render(data))
+        if fields:
+            rows = [{key: value for key, value in row.items() if key in fields} for row in rows]
+        return rows
+
+    def test_full_payload_matches_serializer(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], self.expected())
+
+    def test_field_subsets_match_serializer(self):
+        for fields in (['id', 'name'], ['id', 'last_pinged', 'location'], ['battery_level', 'created_at', 'connected']):
+            with self.subTest(fields=fields):
+                response = self.client.get(self.url, {'fields': ','.join(fields)})
+                self.assertEqual(response.json()['results'], self.expected(fields))
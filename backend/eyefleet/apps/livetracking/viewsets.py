@@ -1,6 +1,8 @@
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.utils import timezone
+from datetime import datetime, timedelta
 from eyefleet.apps.livetracking.models.devices import Device
 from eyefleet.apps.livetracking.models.indicators import Indicator
 from eyefleet.apps.livetracking.serializers import (
@@ -8,12 +10,49 @@ from eyefleet.apps.livetracking.serializers import (
     IndicatorSerializer
 )
 from eyefleet.apps.livetracking.agents.server import LivetrackingAIService
+from eyefleet.apps.livetracking.telemetry import TELEMETRY_COLUMNS, bucket_for, telemetry_rows
+from eyefleet.apps.core.exports import export_response
+from eyefleet.apps.core.mixins import ConditionalGetMixin, FastListMixin, QueryPlanMixin, SparseFieldsMixin
 
-class DeviceViewSet(viewsets.ModelViewSet):
+class DeviceViewSet(FastListMixin, QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Device.objects.all()
     serializer_class = DeviceSerializer
 
-class IndicatorViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def telemetry_export(self, request, pk=None):
+        """Stream a device's telemetry between `start` and `stop` as CSV or NDJSON
+
+        Defaults to the last 24 hours; `indicator` (repeatable) narrows it to
+        some measurements. Rows are streamed from Influx and gzipped as they go.
+        """
+        try:
+            device = self.get_object()
+            stop = self._parse_time(request.query_params.get('stop')) or timezone.now()
+            start = self._parse_time(request.query_params.get('start')) or stop - timedelta(hours=24)
+            if start >= stop:
+                raise ValueError('start must be before stop')
+
+            rows = telemetry_rows(device.id, start, stop, request.query_params.getlist('indicator'))
+            return export_response(
+                request,
+                TELEMETRY_COLUMNS,
+                rows,
+                f'telemetry-{bucket_for(device.id)}-{start:%Y%m%d%H%M}-{stop:%Y%m%d%H%M}',
+                request.query_params.get('file_format', 'csv')
+            )
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=400)
+
+    @staticmethod
+    def _parse_time(value):
+        if not value:
+            return None
+        moment = datetime.fromisoformat(value)
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+class IndicatorViewSet(ConditionalGetMixin, QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Indicator.objects.all()
     serializer_class = IndicatorSerializer
 
@@ -8,8 +8,14 @@ from ..models.inspections import Inspection
 from ..models.parts import AssetPart
 from ..scheduler import MaintenanceScheduler
 from collections import Counter
+from eyefleet.apps.core.cache import cached_query
 from llama_index.experimental.query_engine import PandasQueryEngine
 
+
+def succeeded(result: Dict[str, Any]) -> bool:
+    """Whether a tool result is worth caching; errors may be transient"""
+    return result.get("success", False)
+
 class MaintenanceTools:
     """Tools for maintenance-related operations"""
     
@@ -40,6 +46,7 @@ class MaintenanceTools:
             return {"success": False, "error": str(e)}
 
     @staticmethod
+    @cached_query(Asset, Maintenance, Inspection, cache_if=succeeded)
     def get_asset_history(asset_id: str) -> Dict[str, Any]:
         """Get maintenance history for an asset"""
         try:
@@ -89,6 +96,7 @@ class MaintenanceTools:
         return common_issues
 
     @staticmethod
+    @cached_query(Asset, Maintenance, MaintenanceType, cache_if=succeeded)
     def analyze_maintenance_patterns(asset_id: str) -> Dict[str, Any]:
         """Analyze maintenance patterns for predictive insights"""
         try:
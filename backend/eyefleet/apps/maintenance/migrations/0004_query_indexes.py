@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0002_alter_asset_status'),
+        ('maintenance', '0003_delete_assetpartmanufacturer_delete_assetparttype_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='maintenance',
+            index=models.Index(fields=['ref_asset', '-scheduled_date'], name='maintenance_asset_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inspection',
+            index=models.Index(fields=['ref_asset', '-timestamp'], name='inspection_asset_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['status'], name='asset_status_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0004_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(django.db.models.functions.text.Upper('status'), name='asset_status_upper_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Upper
 import uuid
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -19,6 +20,10 @@ ASSET_STATUS_CHOICES = [
     ('Out of Service', 'Out of Service')
 ]
 
+# Assets free to take work. Matched case-insensitively, which compiles to
+# UPPER("status") and is served by asset_status_upper_idx
+AVAILABLE_STATUS = models.Q(status__iexact='available')
+
 class Asset(models.Model):
     id = models.UUIDField(
         primary_key=True,
@@ -58,6 +63,10 @@ class Asset(models.Model):
 
     class Meta:
         db_table = 'assets'
+        indexes = [
+            models.Index(fields=['status'], name='asset_status_idx'),
+            models.Index(Upper('status'), name='asset_status_upper_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.registration_number
@@ -73,6 +73,8 @@ class Inspection(models.Model):
         ordering = ['-timestamp']
         indexes = [
             models.Index(fields=['reg_number']),
+            # An asset's inspection history, newest first
+            models.Index(fields=['ref_asset', '-timestamp'], name='inspection_asset_time_idx'),
         ]
 class InspectionField(models.Model):
     FIELD_TYPES = (
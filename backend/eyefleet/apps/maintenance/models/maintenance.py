@@ -104,4 +104,6 @@ class Maintenance(models.Model):
         ordering = ['-scheduled_date']
         indexes = [
             models.Index(fields=['reg_number']),
+            # An asset's maintenance history, newest first
+            models.Index(fields=['ref_asset', '-scheduled_date'], name='maintenance_asset_date_idx'),
         ]
\ No newline at end of file
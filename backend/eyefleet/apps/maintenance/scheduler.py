@@ -1,15 +1,86 @@
+import logging
+
 from ortools.sat.python import cp_model
 
 # Import datetime utilities for handling dates and times
 from datetime import datetime, timedelta
 from typing import List
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 
 # Import our custom models that represent maintenance-related database tables
-from eyefleet.apps.maintenance.models import Maintenance, Mechanic, MaintenanceBay, MaintenanceWindow, MaintenanceSchedule
+from eyefleet.apps.maintenance.models import Maintenance, Mechanic, MaintenanceBay, MaintenanceSchedule
+from eyefleet.apps.maintenance.snapshot import MaintenanceProblem, TaskData, MechanicData, BayData, WindowData
+from eyefleet.apps.core.solver import SolverService
+
+logger = logging.getLogger(__name__)
+
+
+# A single candidate assignment: which task, by whom, where and when
+@dataclass(frozen=True)
+class Assignment:
+    maintenance_id: str
+    mechanic_id: int
+    bay_id: int
+    slot: datetime
+
+
+class AssignmentVariables:
+    """Assignment variables indexed by maintenance, mechanic-slot and bay-slot
+
+    Constraints are built from direct index lookups instead of scanning every
+    variable and parsing ids back out of its name.
+    """
+
+    def __init__(self):
+        self.assignments = []  # Assignment for each variable, by position
+        self.variables = []    # BoolVar for each assignment, by position
+        self.by_maintenance = defaultdict(list)
+        self.by_mechanic_slot = defaultdict(list)
+        self.by_bay_slot = defaultdict(list)
+
+    def add(self, assignment: Assignment, var):
+        self.assignments.append(assignment)
+        self.variables.append(var)
+        self.by_maintenance[assignment.maintenance_id].append(var)
+        self.by_mechanic_slot[(assignment.mechanic_id, assignment.slot)].append(var)
+        self.by_bay_slot[(assignment.bay_id, assignment.slot)].append(var)
+
+    def __iter__(self):
+        return iter(zip(self.assignments, self.variables))
+
+    def __len__(self):
+        return len(self.variables)
 
 
 # Main class that handles scheduling maintenance tasks
 class MaintenanceScheduler:
+    # Name solves are recorded under
+    SOLVER_NAME = 'maintenance_slots'
+
+    # Bay sizes from smallest to largest
+    BAY_SIZE_ORDER = {'small': 0, 'medium': 1, 'large': 2}
+
+    # Smallest bay each asset type fits into
+    ASSET_BAY_SIZES = {
+        'car': 'small',
+        'van': 'medium',
+        'truck': 'large',
+        'bus': 'large'
+    }
+
+    # Equipment a bay must have for each maintenance type
+    REQUIRED_EQUIPMENT = {
+        'routine_service': ['Oil Drain System'],
+        'repair': ['Lift'],
+        'inspection': ['Diagnostic Tools'],
+        'emergency': []
+    }
+
     def __init__(self, start_date: datetime, end_date: datetime):
     
         # Store the date range we want to schedule maintenance for
@@ -18,26 +89,69 @@ class MaintenanceScheduler:
 
         # Create a new constraint programming model
         self.model = cp_model.CpModel()
-        # Create a solver that will find solutions to our model
-        self.solver = cp_model.CpSolver()
+        # Create a solver that will find solutions to our model, using the
+        # shared configuration so every solve is recorded
+        self.solver_service = SolverService(self.SOLVER_NAME)
+        self.solver = self.solver_service.solver
+        # Soft penalty for scheduling high priority tasks late
+        self.priority_penalty = 0
 
     def create_variables(self, maintenances: List[Maintenance], mechanics: List[Mechanic], bays: List[MaintenanceBay]):
         """create decision variables for the optimization problem"""
-        # Dictionary to store all our decision variables
-        self.maintenance_vars = {}
-        # Get all possible time slots between start and end date
-        time_slots = self._generate_time_slots()
+        # Store all our decision variables, indexed by what they assign
+        self.variables = AssignmentVariables()
+
+        # Load everything the model needs in one pass; nothing below touches the database
+        self.problem = MaintenanceProblem.load(maintenances, mechanics, bays)
+
+        # Keep the entities being scheduled for constraint and cost lookups
+        self.maintenances = self.problem.tasks
+        self.mechanics = self.problem.mechanics
+
+        # Only create a binary (yes/no) variable for combinations that could
+        # actually be chosen: a qualified mechanic, a suitable bay, and a slot
+        # inside that mechanic's availability
+        for maintenance, mechanic, bay, slot in self._generate_candidates(
+            list(self.problem.tasks.values()),
+            list(self.problem.mechanics.values()),
+            list(self.problem.bays.values())
+        ):
+            assignment = Assignment(maintenance.id, mechanic.id, bay.id, slot)
+            # Add a new binary variable to our model, named by its position
+            self.variables.add(assignment, self.model.NewBoolVar(f'assign_{len(self.variables)}'))
+
+    def _generate_candidates(self, maintenances: List[TaskData], mechanics: List[MechanicData], bays: List[BayData]):
+        """Yield every feasible (maintenance, mechanic, bay, slot) combination"""
+        # Work out each mechanic's available slots once
+        mechanic_slots = {
+            mechanic.id: self._generate_time_slots([
+                window for window, capacity in mechanic.availability if capacity > 0
+            ])
+            for mechanic in mechanics
+        }
 
-        # Create a binary (yes/no) variable for every possible combination of:
-        # maintenance task, mechanic, maintenance bay, and time slot
         for maintenance in maintenances:
-            for mechanic in mechanics:
-                for bay in bays:
-                    for slot in time_slots:
-                        # Create a unique name for this variable
-                        var_name  = f'maintenance_{maintenance.id}_{mechanic.id}_{bay.id}_{slot}'
-                        # Add a new binary variable to our model
-                        self.maintenance_vars[var_name] = self.model.NewBoolVar(var_name)
+            # Mechanics must have every skill the task requires
+            qualified_mechanics = [
+                mechanic for mechanic in mechanics
+                if maintenance.required_skills <= mechanic.skills
+            ]
+            # Bays must be big enough and carry the right equipment
+            suitable_bays = [bay for bay in bays if self._bay_fits(maintenance, bay)]
+
+            for mechanic in qualified_mechanics:
+                for bay in suitable_bays:
+                    for slot in mechanic_slots[mechanic.id]:
+                        yield maintenance, mechanic, bay, slot
+
+    def _bay_fits(self, maintenance: TaskData, bay: BayData) -> bool:
+        """Check a bay is large enough for the asset and has the equipment the task needs"""
+        required_size = self.ASSET_BAY_SIZES.get(maintenance.asset_type, 'small')
+        if self.BAY_SIZE_ORDER.get(bay.size, 0) < self.BAY_SIZE_ORDER[required_size]:
+            return False
+
+        required_equipment = self.REQUIRED_EQUIPMENT.get(maintenance.type_id, [])
+        return all(equipment in bay.equipment for equipment in required_equipment)
     
     def add_constraints(self):
         """add constraints to the optimization problem"""
@@ -50,98 +164,46 @@ class MaintenanceScheduler:
         # Make sure maintenance bays aren't double-booked
         self._add_bay_constraints()
 
-        # Make sure tasks are scheduled within their allowed time windows
-        self._add_window_constraints()
-
-        # Make sure mechanics have the right skills for their assigned tasks
-        self._add_skill_constraints()
+        # Windows and skills need no constraints: variables are only created
+        # for qualified mechanics inside their availability windows
 
         # Handle priority levels for different maintenance tasks
         self._add_priority_constraints()
 
     def _add_assignment_constraints(self):
         """Each maintenance task must be assigned exactly once"""
-        for maintenance in Maintenance.objects.all():
-            task_vars = []
-            for var_name, var in self.maintenance_vars.items():
-                if str(maintenance.id) in var_name:
-                    task_vars.append(var)
-            # Sum of all assignments for this task must equal 1
-            self.model.Add(sum(task_vars) == 1)
+        for maintenance_id in self.maintenances:
+            # A task without candidates makes the model infeasible, as it should
+            self.model.AddExactlyOne(self.variables.by_maintenance[maintenance_id])
 
     def _add_mechanic_constraints(self):
         """Mechanics can't be assigned multiple tasks at the same time"""
-        for mechanic in Mechanic.objects.all():
-            for time_slot in self._generate_time_slots():
-                mechanic_vars = []
-                for var_name, var in self.maintenance_vars.items():
-                    if str(mechanic.id) in var_name and str(time_slot) in var_name:
-                        mechanic_vars.append(var)
-                # Sum of assignments for this mechanic at this time must be <= 1
-                self.model.Add(sum(mechanic_vars) <= 1)
+        for mechanic_vars in self.variables.by_mechanic_slot.values():
+            # Sum of assignments for this mechanic at this time must be <= 1
+            self.model.AddAtMostOne(mechanic_vars)
 
     def _add_bay_constraints(self):
         """Maintenance bays can't have multiple tasks at the same time"""
-        for bay in MaintenanceBay.objects.all():
-            for time_slot in self._generate_time_slots():
-                bay_vars = []
-                for var_name, var in self.maintenance_vars.items():
-                    if str(bay.id) in var_name and str(time_slot) in var_name:
-                        bay_vars.append(var)
-                # Sum of assignments for this bay at this time must be <= 1
-                self.model.Add(sum(bay_vars) <= 1)
-
-    def _add_window_constraints(self):
-        """Tasks must be scheduled within allowed maintenance windows"""
-        for maintenance in Maintenance.objects.all():
-            for var_name, var in self.maintenance_vars.items():
-                if str(maintenance.id) in var_name:
-                    time_slot = self._extract_time_slot(var_name)
-                    window = MaintenanceWindow.objects.filter(
-                        day_of_week=time_slot.weekday()
-                    ).first()
-                    
-                    if not window or (
-                        time_slot.time() < window.start_time or 
-                        time_slot.time() >= window.end_time
-                    ):
-                        # If outside window, this assignment must be 0
-                        self.model.Add(var == 0)
-
-    def _add_skill_constraints(self):
-        """Mechanics must have required skills for assigned tasks"""
-        for maintenance in Maintenance.objects.all():
-            for mechanic in Mechanic.objects.all():
-                required_skills = maintenance.required_skills.all()
-                mechanic_skills = mechanic.skills.all()
-                
-                # If mechanic lacks any required skill
-                if not all(skill in mechanic_skills for skill in required_skills):
-                    # Find all variables involving this maintenance-mechanic pair
-                    for var_name, var in self.maintenance_vars.items():
-                        if (str(maintenance.id) in var_name and 
-                            str(mechanic.id) in var_name):
-                            # This assignment must be 0
-                            self.model.Add(var == 0)
+        for bay_vars in self.variables.by_bay_slot.values():
+            # Sum of assignments for this bay at this time must be <= 1
+            self.model.AddAtMostOne(bay_vars)
 
     def _add_priority_constraints(self):
         """Higher priority tasks should be scheduled earlier"""
-        for maintenance in Maintenance.objects.all():
-            priority_weight = self._get_priority_weight(maintenance.priority)
-            
-            for var_name, var in self.maintenance_vars.items():
-                if str(maintenance.id) in var_name:
-                    time_slot = self._extract_time_slot(var_name)
-                    # Add soft constraint - higher cost for later slots
-                    time_penalty = (time_slot - self.start_date).total_seconds() / 3600
-                    self.model.Add(var * time_penalty * priority_weight)
+        # Soft constraint - higher cost for later slots, added to the objective
+        self.priority_penalty = 0
+        for assignment, var in self.variables:
+            maintenance = self.maintenances[assignment.maintenance_id]
+            priority_weight = self._get_priority_weight(maintenance.priority_id)
+            time_penalty = (assignment.slot - self.start_date).total_seconds() / 3600
+            self.priority_penalty += var * int(round(time_penalty * priority_weight))
 
     def optimize(self):
         """solve the optimization problem"""
         # Tell the model to minimize our objective function (total cost)
-        self.model.Minimize(self._objective_function())
+        self.model.Minimize(self._objective_function() + self.priority_penalty)
         # Try to solve the model
-        status = self.solver.Solve(self.model)
+        status = self.solver_service.solve(self.model)
 
         # If we found an optimal solution, create and return the schedule
         if status == cp_model.OPTIMAL:
@@ -153,94 +215,96 @@ class MaintenanceScheduler:
         """define what we want to optimize (minimize) - in this case, total cost"""
         total_cost = 0
         # Look at each possible assignment in our variables
-        for var_name, var in self.maintenance_vars.items():
-            # Extract the IDs from the variable name
-            maintenance_id = self._extract_maintenance_id(var_name)
-            mechanic_id = self._extract_mechanic_id(var_name)
-            
-            # Look up the actual maintenance task and mechanic objects
-            maintenance = Maintenance.objects.get(id=maintenance_id)
-            mechanic = Mechanic.objects.get(id=mechanic_id)
-            
-            # Calculate cost components:
-            # Base labor cost = mechanic's rate * how long the task takes
-            labor_cost = mechanic.hourly_rate * maintenance.estimated_duration
-            # Adjust cost based on task priority
-            priority_weight = self._get_priority_weight(maintenance.priority)
-            # Factor in mechanic's efficiency rating
-            efficiency = mechanic.efficiency_rating
-            
+        for assignment, var in self.variables:
+            # Look up the snapshotted maintenance task
+            maintenance = self.maintenances[assignment.maintenance_id]
+
+            # Labour cost adjusted for efficiency, weighted by task priority
+            priority_weight = self._get_priority_weight(maintenance.priority_id)
+            cost = self._calculate_cost(assignment.maintenance_id, assignment.mechanic_id)
+
             # Add this assignment's cost to total (only counts if var is 1/True)
-            total_cost += var * (labor_cost * priority_weight / efficiency)
+            # CP-SAT needs integer coefficients, so work in cents
+            total_cost += var * int(round(cost * priority_weight * 100))
         
         return total_cost
     
+    def _selected_assignments(self):
+        """Yield the assignments chosen in the solution"""
+        for assignment, var in self.variables:
+            # If this variable is 1 (True) in our solution
+            if self.solver.Value(var):
+                yield assignment
+
     def _create_schedule(self):
-        """convert the mathematical solution into actual schedule entries"""
+        """convert the mathematical solution into actual schedule entries
+
+        Costs and end times come from the snapshot, and the new plan replaces
+        any earlier plan for the same tasks in a single transaction.
+        """
         # List to store all scheduled maintenance tasks
         schedules = []
-        # Look at each variable in our solution
-        for var_name, var in self.maintenance_vars.items():
-            # If this variable is 1 (True) in our solution
-            if self.solver.Value(var):
-                # Extract all the details from the variable name
-                maintenance_id = self._extract_maintenance_id(var_name)
-                mechanic_id = self._extract_mechanic_id(var_name)
-                bay_id = self._extract_bay_id(var_name)
-                time_slot = self._extract_time_slot(var_name)
-                
-                # Create a new schedule entry in the database
-                schedule = MaintenanceSchedule.objects.create(
-                    maintenance_id=maintenance_id,
-                    mechanic_id=mechanic_id,
-                    bay_id=bay_id,
-                    start_time=time_slot,
-                    end_time=self._calculate_end_time(maintenance_id, time_slot),
-                    estimated_cost=self._calculate_cost(maintenance_id, mechanic_id)
-                )
-                schedules.append(schedule)
+        # Look at each assignment in our solution
+        for assignment in self._selected_assignments():
+            # Build a new schedule entry; they are all saved together below
+            schedules.append(MaintenanceSchedule(
+                maintenance_id=assignment.maintenance_id,
+                mechanic_id=assignment.mechanic_id,
+                bay_id=assignment.bay_id,
+                start_time=assignment.slot,
+                end_time=self._calculate_end_time(assignment.maintenance_id, assignment.slot),
+                estimated_cost=self._calculate_cost(assignment.maintenance_id, assignment.mechanic_id)
+            ))
+
+        with transaction.atomic():
+            # Supersede the previous plan for these tasks
+            MaintenanceSchedule.objects.filter(maintenance_id__in=[schedule.maintenance_id for schedule in schedules]).delete()
+            MaintenanceSchedule.objects.bulk_create(schedules)
         
         return schedules
 
-    def _generate_time_slots(self):
-        """Generate all possible time slots between start_date and end_date"""
-        time_slots = []
-        current_date = self.start_date
-        
-        # Generate slots for each day
-        while current_date <= self.end_date:
-            # Get maintenance windows for this day
-            day_windows = MaintenanceWindow.objects.filter(
-                day_of_week=current_date.weekday()
-            )
+    def _generate_time_slots(self, windows: List[WindowData] = None):
+        """Generate all possible time slots between start_date and end_date
+
+        Only slots inside the given maintenance windows are generated; by
+        default every window in the problem snapshot is used.
+        """
+        if windows is None:
+            windows = self.problem.windows
+
+        time_slots = set()
+        for window, window_start, window_end in self._window_occurrences(windows):
+            # Generate hourly slots within this window
+            current_slot = window_start
+            while current_slot < window_end:
+                time_slots.add(current_slot)
+                current_slot += timedelta(hours=1)
             
-            # For each maintenance window on this day
-            for window in day_windows:
+        return sorted(time_slots)
+
+    def _window_occurrences(self, windows: List[WindowData]):
+        """Yield (window, start, end) for every day a window is active between start_date and end_date"""
+        current_date = self.start_date.date() if isinstance(self.start_date, datetime) else self.start_date
+        last_date = self.end_date.date() if isinstance(self.end_date, datetime) else self.end_date
+        
+        # Walk through each day
+        while current_date <= last_date:
+            # For each maintenance window active on this day
+            for window in windows:
+                if current_date.weekday() not in window.days_of_week:
+                    continue
+
                 # Create datetime objects for window start and end times
                 window_start = datetime.combine(current_date, window.start_time)
                 window_end = datetime.combine(current_date, window.end_time)
-                
-                # Generate hourly slots within this window
-                current_slot = window_start
-                while current_slot < window_end:
-                    time_slots.append(current_slot)
-                    current_slot += timedelta(hours=1)
+                # Windows such as 16:00-00:00 run past midnight
+                if window_end <= window_start:
+                    window_end += timedelta(days=1)
+
+                yield window, window_start, window_end
             
             # Move to next day
             current_date += timedelta(days=1)
-            
-        return time_slots
-
-    def _extract_time_slot(self, var_name: str) -> datetime:
-        """Extract the time slot from a variable name
-        
-        Variable names are in format: maintenance_<id>_<id>_<id>_<datetime>
-        The datetime is the last component after splitting on underscores
-        """
-        # Split the variable name and get the datetime string
-        datetime_str = var_name.split('_')[-1]
-        # Convert string back to datetime object
-        return datetime.strptime(datetime_str, '%Y-%m-%d %H:%M:%S')
 
     def _get_priority_weight(self, priority: str) -> float:
         """Convert priority level to a numerical weight for optimization
@@ -256,33 +320,6 @@ class MaintenanceScheduler:
         }
         return priority_weights.get(priority, 1.0)  # Default to medium priority weight
 
-    def _extract_maintenance_id(self, var_name: str) -> str:
-        """Extract the maintenance ID from a variable name
-        
-        Variable names are in format: maintenance_<maintenance_id>_<mechanic_id>_<bay_id>_<datetime>
-        The maintenance ID is the first component after 'maintenance_'
-        """
-        # Split the variable name and get the maintenance ID
-        return var_name.split('_')[1]
-
-    def _extract_mechanic_id(self, var_name: str) -> str:
-        """Extract the mechanic ID from a variable name
-        
-        Variable names are in format: maintenance_<maintenance_id>_<mechanic_id>_<bay_id>_<datetime>
-        The mechanic ID is the second component after 'maintenance_'
-        """
-        # Split the variable name and get the mechanic ID
-        return var_name.split('_')[2]
-
-    def _extract_bay_id(self, var_name: str) -> str:
-        """Extract the bay ID from a variable name
-        
-        Variable names are in format: maintenance_<maintenance_id>_<mechanic_id>_<bay_id>_<datetime>
-        The bay ID is the third component after 'maintenance_'
-        """
-        # Split the variable name and get the bay ID
-        return var_name.split('_')[3]
-
     def _calculate_end_time(self, maintenance_id: str, start_time: datetime) -> datetime:
         """Calculate the end time for a maintenance task based on its estimated duration
         
@@ -293,11 +330,11 @@ class MaintenanceScheduler:
         Returns:
             datetime: End time of the maintenance task
         """
-        maintenance = Maintenance.objects.get(id=maintenance_id)
+        maintenance = self.maintenances[maintenance_id]
         # Add the estimated duration (in hours) to the start time
-        return start_time + timedelta(hours=maintenance.estimated_duration)
+        return start_time + timedelta(hours=maintenance.duration_hours)
 
-    def _calculate_cost(self, maintenance_id: str, mechanic_id: str) -> float:
+    def _calculate_cost(self, maintenance_id: str, mechanic_id: int) -> float:
         """Calculate the estimated cost for a maintenance task
         
         Args:
@@ -307,11 +344,11 @@ class MaintenanceScheduler:
         Returns:
             float: Estimated cost of the maintenance task
         """
-        maintenance = Maintenance.objects.get(id=maintenance_id)
-        mechanic = Mechanic.objects.get(id=mechanic_id)
+        maintenance = self.maintenances[maintenance_id]
+        mechanic = self.mechanics[mechanic_id]
         
         # Base cost is mechanic's hourly rate times estimated duration
-        base_cost = mechanic.hourly_rate * maintenance.estimated_duration
+        base_cost = mechanic.hourly_rate * maintenance.duration_hours
         
         # Adjust for mechanic's efficiency
         adjusted_cost = base_cost / mechanic.efficiency_rating
@@ -319,4 +356,380 @@ class MaintenanceScheduler:
         # Add any additional costs (parts, materials, etc.)
         total_cost = adjusted_cost + maintenance.additional_costs
         
-        return total_cost
\ No newline at end of file
+        return round(total_cost, 2)
+
+class IntervalMaintenanceScheduler(MaintenanceScheduler):
+    """Interval formulation of the maintenance scheduling problem
+
+    Each (task, mechanic, bay) candidate gets one optional interval sized by
+    the task's estimated duration, placed inside the mechanic's availability
+    windows. Mechanics and bays each get a NoOverlap, so long jobs really
+    block the time they occupy and there is no hourly slot grid. Tasks that
+    no mechanic, bay and window can take are left out and listed in
+    `unschedulable` instead of making the whole batch infeasible.
+    """
+    SOLVER_NAME = 'maintenance_interval'
+
+    def __init__(self, start_date: datetime, end_date: datetime, time_limit: int = 60):
+        super().__init__(start_date, end_date)
+        # Large horizons may not be proven optimal, so bound the search
+        self.solver_service.set_time_limit(time_limit)
+
+        # Minutes on the model's time axis are counted from here
+        self.origin = start_date if isinstance(start_date, datetime) else datetime.combine(start_date, datetime.min.time())
+        # No task may start before this many minutes from the origin
+        self.earliest_start = 0
+
+    def create_variables(self, maintenances: List[Maintenance], mechanics: List[Mechanic], bays: List[MaintenanceBay]):
+        """create one start per task and one optional interval per candidate"""
+        # Load everything the model needs in one pass; nothing below touches the database
+        self.problem = MaintenanceProblem.load(maintenances, mechanics, bays)
+        self.maintenances = self.problem.tasks
+        self.mechanics = self.problem.mechanics
+
+        self.starts = {}
+        # Tasks left out because no mechanic, bay and window can take them
+        self.unschedulable = []
+        self.candidates = []  # (maintenance_id, mechanic_id, bay_id, presence) by position
+        self.by_maintenance = defaultdict(list)
+        self.mechanic_intervals = defaultdict(list)
+        self.bay_intervals = defaultdict(list)
+        # Work booked into windows where a mechanic is only partly available
+        self.fractional_load = defaultdict(list)
+        self.fractional_budget = {}
+
+        # Availability of each mechanic as (start, end, capacity) in minutes
+        mechanic_windows = {
+            mechanic.id: self._mechanic_windows(mechanic)
+            for mechanic in self.mechanics.values()
+        }
+        horizon = max(
+            [end for windows in mechanic_windows.values() for _, end, _ in windows],
+            default=0
+        )
+
+        for maintenance in self.maintenances.values():
+            duration = max(1, int(round(maintenance.duration_hours * 60)))
+            suitable_bays = [bay for bay in self.problem.bays.values() if self._bay_fits(maintenance, bay)]
+
+            options = []
+            for mechanic in self.mechanics.values():
+                # Mechanics must have every skill the task requires
+                if not maintenance.required_skills <= mechanic.skills:
+                    continue
+
+                # The whole job has to fit inside one availability window,
+                # within the share of it a partly available mechanic can give
+                windows = [
+                    (window_start, window_end, capacity)
+                    for window_start, window_end, capacity in mechanic_windows[mechanic.id]
+                    if self._window_budget(window_start, window_end, capacity) >= duration
+                ]
+                if windows:
+                    options.append((mechanic, windows))
+
+            # A task nobody can do would make the whole batch infeasible, so leave it out
+            if not options or not suitable_bays:
+                self.unschedulable.append(maintenance.id)
+                continue
+
+            start = self.model.NewIntVar(self.earliest_start, max(horizon, self.earliest_start), f'start_{maintenance.id}')
+            self.starts[maintenance.id] = start
+            for mechanic, windows in options:
+                for bay in suitable_bays:
+                    self._add_candidate(maintenance, mechanic, bay, start, duration, windows)
+
+        if self.unschedulable:
+            logger.warning(
+                "No mechanic, bay and window can take maintenance %s; leaving it unscheduled",
+                ', '.join(str(maintenance_id) for maintenance_id in self.unschedulable)
+            )
+
+    @staticmethod
+    def _window_budget(window_start: int, window_end: int, capacity: float) -> int:
+        """Minutes of work a mechanic can do in one window"""
+        if capacity >= 1:
+            return window_end - window_start
+        return int(capacity * (window_end - window_start))
+
+    def _add_candidate(self, maintenance: TaskData, mechanic: MechanicData, bay: BayData, start, duration: int, windows):
+        """Add the optional interval for doing a task with this mechanic in this bay"""
+        index = len(self.candidates)
+        presence = self.model.NewBoolVar(f'assign_{index}')
+        interval = self.model.NewOptionalFixedSizeIntervalVar(start, duration, presence, f'interval_{index}')
+
+        self.candidates.append((maintenance.id, mechanic.id, bay.id, presence))
+        self.by_maintenance[maintenance.id].append(presence)
+        self.mechanic_intervals[mechanic.id].append(interval)
+        self.bay_intervals[bay.id].append(interval)
+
+        if all(capacity >= 1 for _, _, capacity in windows):
+            # Fully available: it is enough to restrict where the task may start
+            domain = cp_model.Domain.FromIntervals([
+                [window_start, window_end - duration]
+                for window_start, window_end, _ in windows
+            ])
+            self.model.AddLinearExpressionInDomain(start, domain).OnlyEnforceIf(presence)
+            return
+
+        # Otherwise pick exactly one window so its work can be counted
+        inside_vars = []
+        for window_start, window_end, capacity in windows:
+            inside = self.model.NewBoolVar(f'inside_{index}_{window_start}')
+            self.model.Add(start >= window_start).OnlyEnforceIf(inside)
+            self.model.Add(start <= window_end - duration).OnlyEnforceIf(inside)
+            inside_vars.append(inside)
+
+            if capacity < 1:
+                key = (mechanic.id, window_start)
+                self.fractional_load[key].append((duration, inside))
+                self.fractional_budget[key] = self._window_budget(window_start, window_end, capacity)
+        self.model.Add(sum(inside_vars) == presence)
+
+    def _mechanic_windows(self, mechanic: MechanicData):
+        """List a mechanic's availability as (start, end, capacity) minutes from the origin"""
+        windows = []
+        for window, capacity in mechanic.availability:
+            if capacity <= 0:
+                continue
+            for _, window_start, window_end in self._window_occurrences([window]):
+                start = max(self._to_minutes(window_start), self.earliest_start)
+                end = self._to_minutes(window_end)
+                if end > start:
+                    windows.append((start, end, capacity))
+        return windows
+
+    def _to_minutes(self, moment: datetime) -> int:
+        return int((moment - self.origin).total_seconds() // 60)
+
+    def add_constraints(self):
+        """add constraints to the optimization problem"""
+        # Make sure each maintenance task is assigned exactly once
+        self._add_assignment_constraints()
+
+        # Mechanics and bays handle one job at a time, for its whole duration
+        for intervals in self.mechanic_intervals.values():
+            self.model.AddNoOverlap(intervals)
+        for intervals in self.bay_intervals.values():
+            self.model.AddNoOverlap(intervals)
+
+        # Partly available mechanics can only be booked for their share of a window
+        for key, load in self.fractional_load.items():
+            self.model.Add(
+                sum(duration * inside for duration, inside in load) <= self.fractional_budget[key]
+            )
+
+        # Handle priority levels for different maintenance tasks
+        self._add_priority_constraints()
+
+    def _add_assignment_constraints(self):
+        """Each schedulable maintenance task must be assigned exactly once"""
+        for maintenance_id in self.starts:
+            self.model.AddExactlyOne(self.by_maintenance[maintenance_id])
+
+    def _add_priority_constraints(self):
+        """Higher priority tasks should be scheduled earlier"""
+        # Each minute of delay costs the priority weight in cents, see _objective_function
+        self.priority_penalty = sum(
+            start * int(round(self._get_priority_weight(self.maintenances[maintenance_id].priority_id) * 100))
+            for maintenance_id, start in self.starts.items()
+        )
+
+    def optimize(self):
+        """solve the optimization problem"""
+        self.model.Minimize(self._objective_function() + self.priority_penalty)
+        status = self.solver_service.solve(self.model)
+
+        # Accept the best schedule found within the time limit
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return self._create_schedule()
+        return None
+
+    def _objective_function(self):
+        """total weighted cost, scaled so a priority-weighted hour of delay costs one dollar"""
+        total_cost = 0
+        for maintenance_id, mechanic_id, _, presence in self.candidates:
+            maintenance = self.maintenances[maintenance_id]
+            priority_weight = self._get_priority_weight(maintenance.priority_id)
+            cost = self._calculate_cost(maintenance_id, mechanic_id)
+            # Starts are in minutes, so cents are scaled by 60 to keep the same balance
+            total_cost += presence * int(round(cost * priority_weight * 100 * 60))
+        return total_cost
+
+    def _selected_assignments(self):
+        """Yield the assignments chosen in the solution"""
+        for maintenance_id, mechanic_id, bay_id, presence in self.candidates:
+            if self.solver.Value(presence):
+                start = self.origin + timedelta(minutes=self.solver.Value(self.starts[maintenance_id]))
+                yield Assignment(maintenance_id, mechanic_id, bay_id, start)
+
+
+class MaintenanceReplanner(IntervalMaintenanceScheduler):
+    """Incrementally re-plan a short window of the existing maintenance schedule
+
+    Work that has started, or starts before the freeze boundary, is kept as
+    fixed intervals. Only tasks between the freeze boundary and `until`
+    (plus any new ones) are re-optimized, and they must finish by `until`,
+    so work planned after it is never touched or overlapped. The search is seeded with the
+    current plan as hints, and only rows that actually change are written back.
+    """
+    SOLVER_NAME = 'maintenance_replan'
+
+    # Objective cost of moving an already planned task to another mechanic or bay
+    # (objective units are cents x 60, so this is $50)
+    REASSIGNMENT_PENALTY = 50 * 100 * 60
+
+    def __init__(self, now: datetime, until: datetime, freeze_minutes: int = 120, time_limit: int = 10):
+        # The model works in naive local time, like the maintenance windows
+        super().__init__(self._naive(now), self._naive(until), time_limit)
+        self.frozen_until = self.start_date + timedelta(minutes=freeze_minutes)
+        self.earliest_start = freeze_minutes
+
+        self.current = {}  # existing schedule row by maintenance id, for tasks being re-planned
+        self.frozen = []   # existing schedule rows that must stay where they are
+        self.unschedulable = []
+
+    @staticmethod
+    def _naive(moment: datetime) -> datetime:
+        if timezone.is_aware(moment):
+            return timezone.localtime(moment).replace(tzinfo=None)
+        return moment
+
+    def replan(self, maintenances=(), unavailable_mechanic_ids=()):
+        """Re-optimize the window and write back the diff
+
+        Args:
+            maintenances: new or changed maintenance tasks to fit in
+            unavailable_mechanic_ids: mechanics who can no longer take work
+
+        Returns:
+            dict describing what changed, or None if the window can't be re-planned
+        """
+        unavailable = set(unavailable_mechanic_ids)
+        new_ids = {getattr(maintenance, 'pk', maintenance) for maintenance in maintenances}
+
+        # Everything planned inside the window, plus any rows for the new tasks
+        rows = MaintenanceSchedule.objects.filter(
+            Q(start_time__lt=timezone.make_aware(self.end_date), end_time__gt=timezone.make_aware(self.start_date)) |
+            Q(maintenance_id__in=new_ids)
+        )
+        for row in rows:
+            start = self._naive(row.start_time)
+            started = start <= self.start_date
+            near_term = start < self.frozen_until and row.mechanic_id not in unavailable
+            if started or near_term or start >= self.end_date:
+                self.frozen.append(row)
+            else:
+                self.current[row.maintenance_id] = row
+
+        frozen_ids = {row.maintenance_id for row in self.frozen}
+        task_ids = (set(self.current) | new_ids) - frozen_ids
+        if not task_ids:
+            return self._diff([], [], 0)
+
+        self.create_variables(
+            Maintenance.objects.filter(pk__in=task_ids),
+            Mechanic.objects.exclude(pk__in=unavailable),
+            MaintenanceBay.objects.all()
+        )
+        # Tasks that can't be placed keep their current slot, which still blocks others
+        for maintenance_id in self.unschedulable:
+            if maintenance_id in self.current:
+                self.frozen.append(self.current.pop(maintenance_id))
+        self._add_frozen_intervals()
+        self.add_constraints()
+        self._add_hints()
+        return self.optimize()
+
+    def _mechanic_windows(self, mechanic: MechanicData):
+        """Availability windows cut off at `until`
+
+        Only rows overlapping the re-planning window are loaded, so tasks
+        must not run past it into work the model can't see.
+        """
+        end = self._to_minutes(self.end_date)
+        return [
+            (window_start, min(window_end, end), capacity)
+            for window_start, window_end, capacity in super()._mechanic_windows(mechanic)
+            if window_start < end
+        ]
+
+    def _add_frozen_intervals(self):
+        """Block the mechanic and bay time used by work that isn't being moved"""
+        for row in self.frozen:
+            start = max(self._to_minutes(self._naive(row.start_time)), 0)
+            end = self._to_minutes(self._naive(row.end_time))
+            if end <= start:
+                continue
+
+            interval = self.model.NewFixedSizeIntervalVar(start, end - start, f'frozen_{row.pk}')
+            if row.mechanic_id in self.mechanics:
+                self.mechanic_intervals[row.mechanic_id].append(interval)
+            self.bay_intervals[row.bay_id].append(interval)
+
+    def _add_hints(self):
+        """Start the search from the current plan"""
+        for maintenance_id, mechanic_id, bay_id, presence in self.candidates:
+            row = self.current.get(maintenance_id)
+            if row is not None:
+                self.model.AddHint(presence, (row.mechanic_id, row.bay_id) == (mechanic_id, bay_id))
+
+        for maintenance_id, row in self.current.items():
+            if maintenance_id in self.starts:
+                start = max(self._to_minutes(self._naive(row.start_time)), self.earliest_start)
+                self.model.AddHint(self.starts[maintenance_id], start)
+
+    def _objective_function(self):
+        """total cost, plus a penalty for shuffling tasks that were already planned"""
+        total_cost = super()._objective_function()
+        for maintenance_id, mechanic_id, bay_id, presence in self.candidates:
+            row = self.current.get(maintenance_id)
+            if row is not None and (row.mechanic_id, row.bay_id) != (mechanic_id, bay_id):
+                total_cost += presence * self.REASSIGNMENT_PENALTY
+        return total_cost
+
+    def _create_schedule(self):
+        """write back only the rows that changed"""
+        created, updated, unchanged = [], [], 0
+
+        for assignment in self._selected_assignments():
+            start_time = timezone.make_aware(assignment.slot)
+            end_time = timezone.make_aware(self._calculate_end_time(assignment.maintenance_id, assignment.slot))
+            cost = self._calculate_cost(assignment.maintenance_id, assignment.mechanic_id)
+
+            row = self.current.get(assignment.maintenance_id)
+            if row is None:
+                created.append(MaintenanceSchedule(
+                    maintenance_id=assignment.maintenance_id,
+                    mechanic_id=assignment.mechanic_id,
+                    bay_id=assignment.bay_id,
+                    start_time=start_time,
+                    end_time=end_time,
+                    estimated_cost=cost
+                ))
+            elif (row.mechanic_id, row.bay_id, row.start_time) == (assignment.mechanic_id, assignment.bay_id, start_time):
+                unchanged += 1
+            else:
+                row.mechanic_id = assignment.mechanic_id
+                row.bay_id = assignment.bay_id
+                row.start_time = start_time
+                row.end_time = end_time
+                row.estimated_cost = cost
+                updated.append(row)
+
+        with transaction.atomic():
+            MaintenanceSchedule.objects.bulk_create(created)
+            MaintenanceSchedule.objects.bulk_update(
+                updated, ['mechanic', 'bay', 'start_time', 'end_time', 'estimated_cost']
+            )
+
+        return self._diff(created, updated, unchanged)
+
+    def _diff(self, created, updated, unchanged):
+        return {
+            'created': [row.maintenance_id for row in created],
+            'updated': [row.maintenance_id for row in updated],
+            'unchanged': unchanged,
+            'frozen': len(self.frozen),
+            'unschedulable': list(self.unschedulable)
+        }
@@ -0,0 +1,151 @@
+import re
+from dataclasses import dataclass, field
+from datetime import time
+from typing import Dict, FrozenSet, List, Tuple
+
+from django.db.models import QuerySet
+
+from eyefleet.apps.maintenance.models import (
+    Maintenance, Mechanic, MaintenanceBay, MaintenanceWindow
+)
+
+
+def parse_duration_hours(value) -> float:
+    """Convert an estimated duration such as '4 hours', '90 minutes' or '2.5' to hours"""
+    if value is None:
+        return 1.0
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    match = re.search(r'(\d+(?:\.\d+)?)\s*(m|min|mins|minute|minutes|h|hr|hrs|hour|hours|d|day|days)?\b', str(value).lower())
+    if not match:
+        return 1.0
+
+    amount = float(match.group(1))
+    unit = match.group(2) or 'hours'
+    if unit.startswith('m'):
+        return amount / 60
+    if unit.startswith('d'):
+        return amount * 24
+    return amount
+
+
+@dataclass(frozen=True)
+class WindowData:
+    id: int
+    start_time: time
+    end_time: time
+    days_of_week: Tuple[int, ...]
+    location: str
+
+
+@dataclass(frozen=True)
+class TaskData:
+    id: str
+    asset_type: str
+    type_id: str
+    priority_id: str
+    duration_hours: float
+    additional_costs: float
+    required_skills: FrozenSet[int]
+
+
+@dataclass(frozen=True)
+class MechanicData:
+    id: int
+    hourly_rate: float
+    efficiency_rating: float
+    skills: FrozenSet[int]
+    # (window, capacity) pairs from MechanicAvailability
+    availability: Tuple[Tuple[WindowData, float], ...]
+
+
+@dataclass(frozen=True)
+class BayData:
+    id: int
+    location: str
+    size: str
+    equipment: Tuple[str, ...]
+
+
+@dataclass
+class MaintenanceProblem:
+    """Everything the maintenance scheduler needs, loaded in a fixed number of queries
+
+    Model building reads only from this snapshot, so the number of queries
+    does not grow with the number of tasks, mechanics, bays or variables.
+    """
+    tasks: Dict[str, TaskData] = field(default_factory=dict)
+    mechanics: Dict[int, MechanicData] = field(default_factory=dict)
+    bays: Dict[int, BayData] = field(default_factory=dict)
+    windows: List[WindowData] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, maintenances, mechanics, bays) -> 'MaintenanceProblem':
+        """Snapshot the given maintenances, mechanics and bays (objects or querysets)"""
+        problem = cls()
+
+        # 1 query for windows
+        windows = {
+            window.id: cls._window_data(window)
+            for window in MaintenanceWindow.objects.all()
+        }
+        problem.windows = list(windows.values())
+
+        # 2 queries for tasks and their required skills
+        for maintenance in Maintenance.objects.filter(
+            pk__in=cls._keys(maintenances)
+        ).prefetch_related('required_skills'):
+            problem.tasks[maintenance.id] = TaskData(
+                id=maintenance.id,
+                asset_type=maintenance.asset_type,
+                type_id=maintenance.type_id,
+                priority_id=maintenance.priority_id,
+                duration_hours=parse_duration_hours(maintenance.estimated_duration),
+                additional_costs=float(maintenance.additional_costs or 0),
+                required_skills=frozenset(skill.id for skill in maintenance.required_skills.all())
+            )
+
+        # 3 queries for mechanics, their skills and their availability
+        for mechanic in Mechanic.objects.filter(
+            pk__in=cls._keys(mechanics)
+        ).prefetch_related('skills', 'mechanicavailability_set'):
+            problem.mechanics[mechanic.id] = MechanicData(
+                id=mechanic.id,
+                hourly_rate=float(mechanic.hourly_rate),
+                efficiency_rating=mechanic.efficiency_rating or 1.0,
+                skills=frozenset(skill.id for skill in mechanic.skills.all()),
+                availability=tuple(
+                    (windows[availability.window_id], availability.capacity)
+                    for availability in mechanic.mechanicavailability_set.all()
+                    if availability.window_id in windows
+                )
+            )
+
+        # 1 query for bays
+        for bay in MaintenanceBay.objects.filter(pk__in=cls._keys(bays)):
+            problem.bays[bay.id] = BayData(
+                id=bay.id,
+                location=bay.location,
+                size=bay.size,
+                equipment=tuple(bay.equipment or [])
+            )
+
+        return problem
+
+    @staticmethod
+    def _keys(objects):
+        """Primary keys to load; querysets become a subquery instead of being fetched"""
+        if isinstance(objects, QuerySet):
+            return objects.values('pk')
+        return [obj.pk for obj in objects]
+
+    @staticmethod
+    def _window_data(window: MaintenanceWindow) -> WindowData:
+        return WindowData(
+            id=window.id,
+            start_time=window.start_time,
+            end_time=window.end_time,
+            days_of_week=tuple(window.days_of_week or []),
+            location=window.location
+        )
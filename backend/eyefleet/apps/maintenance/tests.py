@@ -0,0 +1,173 @@
+import json
+from datetime import datetime, time, timezone
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from ortools.sat.python import cp_model
+from rest_framework.renderers import JSONRenderer
+
+from eyefleet.apps.maintenance.models import (
+    Asset, Inspection, InspectionField, InspectionFieldResponse, InspectionResponse,
+    InspectionStatus, InspectionType, Location
+)
+from eyefleet.apps.maintenance.serializers import AssetSerializer
+from eyefleet.apps.maintenance.scheduler import IntervalMaintenanceScheduler, MaintenanceReplanner
+from eyefleet.apps.maintenance.snapshot import (
+    BayData, MaintenanceProblem, MechanicData, TaskData, WindowData
+)
+
+# 08:00-16:00 every day
+DAY_SHIFT = WindowData(id=1, start_time=time(8), end_time=time(16), days_of_week=tuple(range(7)), location='Depot')
+# 16:00-00:00 every day, running past midnight
+LATE_SHIFT = WindowData(id=2, start_time=time(16), end_time=time(0), days_of_week=tuple(range(7)), location='Depot')
+
+
+def make_task(task_id, hours):
+    return TaskData(
+        id=task_id, asset_type='car', type_id='emergency', priority_id='medium',
+        duration_hours=hours, additional_costs=0.0, required_skills=frozenset()
+    )
+
+
+def make_mechanic(mechanic_id, capacity):
+    return MechanicData(
+        id=mechanic_id, hourly_rate=50.0, efficiency_rating=1.0,
+        skills=frozenset(), availability=((DAY_SHIFT, capacity),)
+    )
+
+
+class IntervalMaintenanceSchedulerTests(SimpleTestCase):
+    def build(self, tasks, mechanics, bays=1):
+        problem = MaintenanceProblem(
+            tasks={task.id: task for task in tasks},
+            mechanics={mechanic.id: mechanic for mechanic in mechanics},
+            bays={bay_id: BayData(id=bay_id, location='Depot', size='large', equipment=()) for bay_id in range(1, bays + 1)},
+            windows=[DAY_SHIFT]
+        )
+        scheduler = IntervalMaintenanceScheduler(datetime(2024, 1, 1), datetime(2024, 1, 6))
+        with mock.patch.object(MaintenanceProblem, 'load', return_value=problem):
+            scheduler.create_variables([], [], [])
+        scheduler.add_constraints()
+        return scheduler
+
+    def test_long_task_with_fractional_capacity_mechanics(self):
+        tasks = [make_task('long', 8), make_task('too-long', 10)] + [make_task(f'short-{i}', 2) for i in range(6)]
+        # Only mechanic 1 can give a whole 8h shift to one job
+        mechanics = [make_mechanic(1, 1.0)] + [make_mechanic(i, 0.5) for i in range(2, 11)]
+        scheduler = self.build(tasks, mechanics, bays=5)
+
+        self.assertEqual(scheduler.unschedulable, ['too-long'])
+        long_mechanics = {
+            mechanic_id for maintenance_id, mechanic_id, _, _ in scheduler.candidates
+            if maintenance_id == 'long'
+        }
+        self.assertEqual(long_mechanics, {1})
+
+        status = scheduler.solver.Solve(scheduler.model)
+        self.assertIn(status, (cp_model.OPTIMAL, cp_model.FEASIBLE))
+        assigned = {assignment.maintenance_id: assignment for assignment in scheduler._selected_assignments()}
+        self.assertEqual(set(assigned), {task.id for task in tasks} - {'too-long'})
+        self.assertEqual(assigned['long'].mechanic_id, 1)
+
+    def test_half_time_mechanic_keeps_to_budget(self):
+        # Two 3h jobs can't share a half-time 8h window (4h budget)
+        scheduler = self.build([make_task('a', 3), make_task('b', 3)], [make_mechanic(1, 0.5)])
+
+        status = scheduler.solver.Solve(scheduler.model)
+        self.assertIn(status, (cp_model.OPTIMAL, cp_model.FEASIBLE))
+        days = {assignment.slot.date() for assignment in scheduler._selected_assignments()}
+        self.assertEqual(len(days), 2)
+
+
+class MaintenanceReplannerTests(SimpleTestCase):
+    def test_windows_end_at_until(self):
+        replanner = MaintenanceReplanner(datetime(2024, 1, 1, 6), datetime(2024, 1, 2, 20), freeze_minutes=0)
+        mechanic = MechanicData(
+            id=1, hourly_rate=50.0, efficiency_rating=1.0, skills=frozenset(),
+            availability=((DAY_SHIFT, 1.0), (LATE_SHIFT, 1.0))
+        )
+
+        windows = replanner._mechanic_windows(mechanic)
+        until = replanner._to_minutes(datetime(2024, 1, 2, 20))
+        self.assertTrue(windows)
+        self.assertEqual(max(end for _, end, _ in windows), until)
+
+
+def add_assets(count):
+    start = Asset.objects.count()
+    for number in range(start, start + count):
+        Asset.objects.create(
+            registration_number=f'REG-{number}', manufacturer='Ford', type='van', status='Available',
+            location={'lat': 1.5, 'lng': number}, fuel_level=number, capacity_weight=1000.5
+        )
+
+
+def add_inspections(count):
+    inspection_type, _ = InspectionType.objects.get_or_create(id='routine')
+    inspection_status, _ = InspectionStatus.objects.get_or_create(id='completed')
+    location, _ = Location.objects.get_or_create(id='main_depot')
+    start = Inspection.objects.count()
+    for number in range(start, start + count):
+        inspection = Inspection.objects.create(
+            id=f'INS-{number}', timestamp=datetime(2024, 1, 1, tzinfo=timezone.utc), type=inspection_type,
+            status=inspection_status, location=location, reg_number='REG-1', mileage=100, duration='1h'
+        )
+        field = InspectionField.objects.create(inspection=inspection, label='Tyres', field_type='text')
+        response = InspectionResponse.objects.create(
+            inspection=inspection, submitted_by='inspector', submitted_at=datetime(2024, 1, 1, tzinfo=timezone.utc)
+        )
+        InspectionFieldResponse.objects.create(inspection_response=response, field=field, value='ok')
+
+
+class ListQueryCountTests(TestCase):
+    """List pages take the same number of queries whatever they hold"""
+
+    def assertConstantQueries(self, url, add_rows, queries):
+        add_rows(1)
+        with self.assertNumQueries(queries):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        add_rows(20)
+        with self.assertNumQueries(queries):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_asset_list(self):
+        self.assertConstantQueries('/api/maintenance/assets/', add_assets, 1)
+
+    def test_asset_list_with_fields(self):
+        self.assertConstantQueries('/api/maintenance/assets/?fields=id,status', add_assets, 1)
+
+    def test_nested_inspection_list(self):
+        # Inspections, then prefetches of fields, responses and their field responses
+        self.assertConstantQueries('/api/maintenance/inspections/', add_inspections, 4)
+
+    def test_nested_inspection_list_with_fields(self):
+        # Unrequested nested fields aren't prefetched
+        self.assertConstantQueries('/api/maintenance/inspections/?fields=id,responses', add_inspections, 3)
+        self.assertConstantQueries('/api/maintenance/inspections/?fields=id,reg_number', add_inspections, 1)
+
+
+class AssetFastListParityTests(TestCase):
+    url = '/api/maintenance/assets/'
+
+    def setUp(self):
+        add_assets(5)
+        Asset.objects.create(registration_number='BARE-1')
+
+    def expected(self, fields=None):
+        # What the plain ModelSerializer and JSONRenderer would send
+        data = AssetSerializer(Asset.objects.order_by('-pk'), many=True).data
+        rows = json.loads(JSONRenderer().render(data))
+        if fields:
+            rows = [{key: value for key, value in row.items() if key in fields} for row in rows]
+        return rows
+
+    def test_full_payload_matches_serializer(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], self.expected())
+
+    def test_field_subsets_match_serializer(self):
+        for fields in (['id', 'status'], ['id', 'location', 'capacity_weight'], ['registration_number', 'updated_at', 'on_trip']):
+            with self.subTest(fields=fields):
+                response = self.client.get(self.url, {'fields': ','.join(fields)})
+                self.assertEqual(response.json()['results'], self.expected(fields))
@@ -25,68 +25,112 @@ from eyefleet.apps.maintenance.serializers import (
 from eyefleet.apps.maintenance.agents.server import MaintenanceAIService
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework import status
+from django.utils import timezone
+from datetime import datetime
+from eyefleet.apps.maintenance.scheduler import MaintenanceReplanner
+from eyefleet.apps.core.mixins import BulkActionsMixin, CachedResponseMixin, ConditionalGetMixin, ExportMixin, FastListMixin, QueryPlanMixin, SparseFieldsMixin
 
 
 # Maintenance related viewsets
-class MaintenanceTypeViewSet(viewsets.ModelViewSet):
+class MaintenanceTypeViewSet(ConditionalGetMixin, QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = MaintenanceType.objects.all()
     serializer_class = MaintenanceTypeSerializer
 
-class MaintenanceStatusViewSet(viewsets.ModelViewSet):
+class MaintenanceStatusViewSet(ConditionalGetMixin, QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = MaintenanceStatus.objects.all()
     serializer_class = MaintenanceStatusSerializer
 
-class MaintenancePriorityViewSet(viewsets.ModelViewSet):
+class MaintenancePriorityViewSet(ConditionalGetMixin, QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = MaintenancePriority.objects.all()
     serializer_class = MaintenancePrioritySerializer
 
-class MaintenanceRequestViewSet(viewsets.ModelViewSet):
+class MaintenanceRequestViewSet(QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = MaintenanceRequest.objects.all()
     serializer_class = MaintenanceRequestSerializer
 
-class MaintenanceViewSet(viewsets.ModelViewSet):
+class MaintenanceViewSet(BulkActionsMixin, ExportMixin, QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Maintenance.objects.all()
     serializer_class = MaintenanceSerializer
 
+    @action(detail=False, methods=['post'])
+    def replan(self, request):
+        """Re-plan the near-term maintenance schedule after a disruption
+
+        Work that has started or starts within `freeze_minutes` stays put.
+        Tasks between then and `until`, plus any `maintenance_ids` passed in,
+        are re-optimized to finish by `until` around mechanics listed in
+        `unavailable_mechanic_ids`, and only changed rows are written. Tasks
+        that can't be placed are listed under `unschedulable`.
+        """
+        try:
+            now = timezone.now()
+            until = datetime.fromisoformat(request.data.get('until'))
+            if timezone.is_naive(until):
+                until = timezone.make_aware(until)
+            freeze_minutes = int(request.data.get('freeze_minutes', 120))
+
+            replanner = MaintenanceReplanner(now, until, freeze_minutes=freeze_minutes)
+            diff = replanner.replan(
+                maintenances=request.data.get('maintenance_ids', []),
+                unavailable_mechanic_ids=request.data.get('unavailable_mechanic_ids', [])
+            )
+            if diff is None:
+                return Response(
+                    {'error': 'No feasible schedule for the re-planning window'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            return Response(diff, status=status.HTTP_200_OK)
+        except (TypeError, ValueError) as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
 # Inspection related viewsets
-class InspectionTypeViewSet(viewsets.ModelViewSet):
+class InspectionTypeViewSet(ConditionalGetMixin, QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = InspectionType.objects.all()
     serializer_class = InspectionTypeSerializer
 
-class InspectionStatusViewSet(viewsets.ModelViewSet):
+class InspectionStatusViewSet(ConditionalGetMixin, QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = InspectionStatus.objects.all()
     serializer_class = InspectionStatusSerializer
 
-class LocationViewSet(viewsets.ModelViewSet):
+class LocationViewSet(ConditionalGetMixin, QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Location.objects.all()
     serializer_class = LocationSerializer
 
-class InspectionFieldViewSet(viewsets.ModelViewSet):
+class InspectionFieldViewSet(QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = InspectionField.objects.all()
     serializer_class = InspectionFieldSerializer
 
-class InspectionFieldResponseViewSet(viewsets.ModelViewSet):
+class InspectionFieldResponseViewSet(QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = InspectionFieldResponse.objects.all()
     serializer_class = InspectionFieldResponseSerializer
 
-class InspectionResponseViewSet(viewsets.ModelViewSet):
+class InspectionResponseViewSet(QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = InspectionResponse.objects.all()
     serializer_class = InspectionResponseSerializer
 
-class InspectionViewSet(viewsets.ModelViewSet):
+class InspectionViewSet(ExportMixin, QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Inspection.objects.all()
     serializer_class = InspectionSerializer
 
 # Asset related viewsets
-class AssetViewSet(viewsets.ModelViewSet):
+class AssetViewSet(BulkActionsMixin, FastListMixin, QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Asset.objects.all()
     serializer_class = AssetSerializer
 
-class AssetPartSupplierViewSet(viewsets.ModelViewSet):
+class AssetPartSupplierViewSet(CachedResponseMixin, QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = AssetPartSupplier.objects.all()
     serializer_class = AssetPartSupplierSerializer
 
-class AssetPartViewSet(viewsets.ModelViewSet):
+class AssetPartViewSet(CachedResponseMixin, QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = AssetPart.objects.all()
     serializer_class = AssetPartSerializer
 
@@ -3,6 +3,7 @@ from eyefleet.apps.scheduling.models.missions import Mission, MissionAssignedEmp
 from eyefleet.apps.scheduling.models.pilots import Pilot
 from eyefleet.apps.scheduling.models.schedules import MissionSchedule, Trip
 from eyefleet.apps.scheduling.models.cargo import Cargo
+from eyefleet.apps.scheduling.models.jobs import OptimizationJob
 
 # Register your models here.
 admin.site.register(Mission)
@@ -11,3 +12,4 @@ admin.site.register(MissionAssignedEmployee)
 admin.site.register(Pilot)
 admin.site.register(MissionSchedule)
 admin.site.register(Cargo)
+admin.site.register(OptimizationJob)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class SchedulingConfig(AppConfig):
     name = 'eyefleet.apps.scheduling'
+
+    def ready(self):
+        # Keep the vehicle/driver conflict index in step with saves
+        from . import signals
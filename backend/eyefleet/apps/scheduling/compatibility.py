@@ -0,0 +1,75 @@
+from typing import List, Tuple
+
+import numpy as np
+from django.db.models import Sum
+
+from .models.missions import Mission
+from eyefleet.apps.maintenance.models.assets import Asset
+
+
+def mission_cargo_totals(missions: List[Mission]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Load the total cargo weight and volume of every mission in one aggregated query
+
+    Missions without cargo fall back to their own total_weight/total_volume.
+    Returns two float arrays aligned with the order of `missions`.
+    """
+    totals = {
+        mission_id: (cargo_weight, cargo_volume, total_weight, total_volume)
+        for mission_id, cargo_weight, cargo_volume, total_weight, total_volume in (
+            Mission.objects
+            .filter(id__in=[mission.id for mission in missions])
+            .annotate(cargo_weight=Sum('cargos__weight'), cargo_volume=Sum('cargos__volume'))
+            .values_list('id', 'cargo_weight', 'cargo_volume', 'total_weight', 'total_volume')
+        )
+    }
+
+    weights = np.zeros(len(missions))
+    volumes = np.zeros(len(missions))
+    for i, mission in enumerate(missions):
+        cargo_weight, cargo_volume, total_weight, total_volume = totals.get(
+            mission.id, (None, None, None, None)
+        )
+        weights[i] = cargo_weight if cargo_weight is not None else (total_weight or 0)
+        volumes[i] = cargo_volume if cargo_volume is not None else (total_volume or 0)
+
+    return weights, volumes
+
+
+def compatibility_matrix(
+    weights: np.ndarray,
+    volumes: np.ndarray,
+    assets: List[Asset]
+) -> np.ndarray:
+    """
+    Build a boolean missions x assets matrix of which asset can carry which mission
+
+    An asset is compatible when it is available and both its weight and volume
+    capacity cover the mission's load. Assets with an unknown capacity never match.
+    """
+    available = np.array([
+        (asset.status or '').lower() == 'available' for asset in assets
+    ], dtype=bool)
+    capacity_weight = np.array([
+        asset.capacity_weight if asset.capacity_weight is not None else np.nan
+        for asset in assets
+    ], dtype=float)
+    capacity_volume = np.array([
+        asset.capacity_volume if asset.capacity_volume is not None else np.nan
+        for asset in assets
+    ], dtype=float)
+
+    # Broadcast missions (rows) against assets (columns); NaN compares False
+    return (
+        available[np.newaxis, :]
+        & (capacity_weight[np.newaxis, :] >= weights[:, np.newaxis])
+        & (capacity_volume[np.newaxis, :] >= volumes[:, np.newaxis])
+    )
+
+
+def build_compatibility_matrix(missions: List[Mission], assets: List[Asset]) -> np.ndarray:
+    """
+    Load cargo totals for the missions and compare them against the assets
+    """
+    weights, volumes = mission_cargo_totals(missions)
+    return compatibility_matrix(weights, volumes, assets)
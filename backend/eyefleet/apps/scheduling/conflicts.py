@@ -0,0 +1,253 @@
+import logging
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from eyefleet.apps.core.routers import use_replica
+
+from .models.schedules import MissionSchedule, Trip
+from .recurrence import occurrences_between, occurrence_window
+
+# Statuses that still hold a vehicle or driver
+LIVE_SCHEDULE_STATUSES = ['scheduled', 'in_progress']
+LIVE_TRIP_STATUSES = ['scheduled', 'ongoing']
+
+# Recurring schedules are expanded this far ahead for conflict checks
+HORIZON_DAYS = 90
+
+# A resource is ('vehicle', asset id) or ('driver', driver name)
+Resource = Tuple[str, str]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, order=True)
+class Booking:
+    """A period during which a trip or schedule occupies a vehicle or driver"""
+    start: datetime
+    end: datetime
+    kind: str  # 'trip' or 'schedule'
+    object_id: str
+
+
+class IntervalIndex:
+    """Bookings for one resource, sorted by start
+
+    Any booking overlapping [start, end) must start after start minus the
+    longest booking, so overlap queries are two bisects plus the overlaps
+    themselves.
+    """
+
+    def __init__(self, bookings: Iterable[Booking] = ()):
+        self.bookings = sorted(bookings)
+        self.starts = [booking.start for booking in self.bookings]
+        self.max_length = max((booking.end - booking.start for booking in self.bookings), default=timedelta(0))
+
+    def add(self, booking: Booking):
+        index = bisect_left(self.bookings, booking)
+        self.bookings.insert(index, booking)
+        self.starts.insert(index, booking.start)
+        self.max_length = max(self.max_length, booking.end - booking.start)
+
+    def remove(self, kind: str, object_id: str):
+        keep = [
+            booking for booking in self.bookings
+            if (booking.kind, booking.object_id) != (kind, object_id)
+        ]
+        if len(keep) != len(self.bookings):
+            self.bookings = keep
+            self.starts = [booking.start for booking in keep]
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Booking]:
+        low = bisect_left(self.starts, start - self.max_length)
+        high = bisect_left(self.starts, end)
+        return [booking for booking in self.bookings[low:high] if booking.end > start]
+
+    def __len__(self):
+        return len(self.bookings)
+
+
+def resources_for(instance) -> List[Resource]:
+    """The vehicle and driver a trip or schedule books"""
+    resources = []
+    if instance.vehicle_id:
+        resources.append(('vehicle', str(instance.vehicle_id)))
+    if instance.driver:
+        resources.append(('driver', str(instance.driver)))
+    return resources
+
+
+def bookings_for(instance, now: datetime = None) -> List[Booking]:
+    """The periods a trip or schedule occupies its resources"""
+    now = now or timezone.now()
+
+    if isinstance(instance, Trip):
+        if instance.status not in LIVE_TRIP_STATUSES:
+            return []
+        return [Booking(instance.start_time, instance.end_time, 'trip', str(instance.pk))]
+
+    if instance.status not in LIVE_SCHEDULE_STATUSES:
+        return []
+    bookings = []
+    for occurrence in occurrences_between(instance, now - timedelta(days=1), now + timedelta(days=HORIZON_DAYS)):
+        start, end = occurrence_window(instance, occurrence)
+        bookings.append(Booking(start, end, 'schedule', str(instance.pk)))
+    return bookings
+
+
+class ConflictIndex:
+    """Per-process interval indexes of vehicle and driver bookings
+
+    Each resource's index is built from the database the first time it is
+    queried. Once a save commits it updates the local index in place and
+    bumps a shared version in the cache, so other processes rebuild only
+    the resources that changed. Cache errors never fail the write; the
+    index is then rebuilt from the database instead.
+    """
+
+    def __init__(self):
+        self.indexes: Dict[Resource, IntervalIndex] = {}
+        self.versions: Dict[Resource, int] = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _version_key(resource: Resource) -> str:
+        return f'conflict-index:{resource[0]}:{resource[1]}'
+
+    def _shared_version(self, resource: Resource):
+        """The resource's shared version, or None if the cache can't be read"""
+        try:
+            return cache.get(self._version_key(resource), 0)
+        except Exception:
+            logger.exception("Failed to read the conflict index version of %s", resource)
+            return None
+
+    def _bump(self, resource: Resource):
+        """Bump the resource's shared version, or return None if the cache can't be written"""
+        key = self._version_key(resource)
+        try:
+            cache.add(key, 0, None)
+            try:
+                return cache.incr(key)
+            except ValueError:
+                # The key expired between add and incr
+                cache.set(key, 1, None)
+                return 1
+        except Exception:
+            logger.exception("Failed to bump the conflict index version of %s", resource)
+            return None
+
+    def index(self, resource: Resource) -> IntervalIndex:
+        """The resource's index, rebuilt if another process changed it"""
+        version = self._shared_version(resource)
+        with self.lock:
+            if version is not None and resource in self.indexes and self.versions.get(resource) == version:
+                return self.indexes[resource]
+
+        index = IntervalIndex(self._load(resource))
+        # Without a shared version there is no telling when it goes stale
+        if version is not None:
+            with self.lock:
+                self.indexes[resource] = index
+                self.versions[resource] = version
+        return index
+
+    def _load(self, resource: Resource) -> List[Booking]:
+        kind, value = resource
+        now = timezone.now()
+        lookup = {'vehicle_id': value} if kind == 'vehicle' else {'driver': value}
+
+        trips = Trip.objects.filter(
+            status__in=LIVE_TRIP_STATUSES,
+            end_time__gte=now - timedelta(days=1),
+            **lookup
+        )
+        schedules = MissionSchedule.objects.filter(
+            status__in=LIVE_SCHEDULE_STATUSES,
+            next_occurrence__isnull=False,
+            **lookup
+        )
+
+        # The index is kept per shared version, which a lagging replica may not have reached
+        bookings = []
+        with use_replica(False):
+            for instance in list(trips) + list(schedules):
+                bookings.extend(bookings_for(instance, now))
+        return bookings
+
+    def busy(self, resource: Resource, start: datetime, end: datetime) -> List[Booking]:
+        """Who or what holds the resource between start and end"""
+        return self.index(resource).overlapping(start, end)
+
+    def conflicts(self, instance) -> Dict[Resource, List[Booking]]:
+        """Bookings that an (unsaved or edited) trip or schedule would clash with"""
+        own = ('trip' if isinstance(instance, Trip) else 'schedule', str(instance.pk))
+        bookings = bookings_for(instance)
+
+        conflicts = {}
+        for resource in resources_for(instance):
+            index = self.index(resource)
+            clashes = {
+                other
+                for booking in bookings
+                for other in index.overlapping(booking.start, booking.end)
+                if (other.kind, other.object_id) != own
+            }
+            if clashes:
+                conflicts[resource] = sorted(clashes)
+        return conflicts
+
+    def refresh(self, instance, previous_resources: Iterable[Resource] = (), using: str = None):
+        """Re-index one saved or deleted trip or schedule once the transaction commits
+
+        Deferring to the commit keeps other processes from rebuilding the
+        index from uncommitted rows, and a rollback from leaving it changed.
+        """
+        kind = 'trip' if isinstance(instance, Trip) else 'schedule'
+        object_id = str(instance.pk)
+        current = resources_for(instance) if not getattr(instance, '_conflict_deleted', False) else []
+        bookings = bookings_for(instance) if current else []
+        resources = set(previous_resources) | set(current)
+
+        transaction.on_commit(lambda: self._apply(kind, object_id, resources, current, bookings), using=using)
+
+    def _apply(self, kind: str, object_id: str, resources, current, bookings):
+        for resource in resources:
+            version = self._bump(resource)
+            with self.lock:
+                index = self.indexes.get(resource)
+                if index is None:
+                    continue
+                if version is None:
+                    # Other processes can't be told, so don't trust this copy either
+                    del self.indexes[resource]
+                    continue
+                index.remove(kind, object_id)
+                if resource in current:
+                    for booking in bookings:
+                        index.add(booking)
+                # Only skip the rebuild if nobody else changed it in between
+                if self.versions.get(resource) == version - 1:
+                    self.versions[resource] = version
+
+    def invalidate(self, resources: Iterable[Resource], using: str = None):
+        """Force a rebuild of these resources everywhere once the transaction commits, e.g. after bulk writes"""
+        resources = set(resources)
+
+        def bump():
+            for resource in resources:
+                if self._bump(resource) is None:
+                    with self.lock:
+                        self.indexes.pop(resource, None)
+
+        transaction.on_commit(bump, using=using)
+
+
+# Shared by the signal handlers and the API in this process
+conflict_index = ConflictIndex()
@@ -0,0 +1,40 @@
+import json
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+
+class RouteOptimizationConsumer(AsyncWebsocketConsumer):
+    """Streams improving route solutions for a schedule while it is optimized"""
+
+    async def connect(self):
+        schedule_id = self.scope['url_route']['kwargs']['schedule_id']
+        self.group_name = f"route_optimization_{schedule_id}"
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def send_route_progress(self, event):
+        message = event['message']
+        await self.send(text_data=json.dumps({
+            'message': message
+        }))
+
+
+class OptimizationJobConsumer(AsyncWebsocketConsumer):
+    """Pushes status and progress updates for a queued optimization job"""
+
+    async def connect(self):
+        job_id = self.scope['url_route']['kwargs']['job_id']
+        self.group_name = f"optimization_job_{job_id}"
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def send_job_update(self, event):
+        message = event['message']
+        await self.send(text_data=json.dumps({
+            'message': message
+        }))
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+
+from eyefleet.apps.scheduling.models import Cargo, Mission, MissionSchedule, OptimizationJob
+from eyefleet.apps.scheduling.scheduler import MissionOptimizer, MissionScheduler
+from eyefleet.apps.maintenance.models import Asset
+from eyefleet.apps.maintenance.models.assets import AVAILABLE_STATUS
+
+logger = logging.getLogger(__name__)
+
+# Tables the solvers read, or whose rows mission loads are derived from,
+# fingerprinted by row count and latest updated_at
+FINGERPRINT_MODELS = (Mission, MissionSchedule, Asset, Cargo)
+
+# Link tables the solvers read. Links are only ever added or removed, so
+# their row count and highest id change whenever they do
+FINGERPRINT_LINKS = (Mission.cargos.through,)
+
+# How long a finished job's result is reused for an identical request (seconds)
+RESULT_TTL = getattr(settings, 'OPTIMIZATION_RESULT_TTL', 60 * 60)
+
+# Jobs queued or running for longer than this are assumed lost, e.g. to a
+# worker crash or a dropped broker message (seconds)
+JOB_TIMEOUT = getattr(settings, 'OPTIMIZATION_JOB_TIMEOUT', 30 * 60)
+
+
+def problem_hash(kind: str, parameters: Dict[str, Any]) -> str:
+    """
+    Hash a request together with a fingerprint of the data it reads, so that
+    identical requests against unchanged data map to the same job
+    """
+    fingerprint = [
+        model.objects.aggregate(count=Count('pk'), updated=Max('updated_at'))
+        for model in FINGERPRINT_MODELS
+    ] + [
+        links.objects.aggregate(count=Count('pk'), last=Max('pk'))
+        for links in FINGERPRINT_LINKS
+    ]
+    payload = json.dumps(
+        {'kind': kind, 'parameters': parameters, 'data': fingerprint},
+        sort_keys=True,
+        cls=DjangoJSONEncoder
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def submit_job(kind: str, parameters: Dict[str, Any]) -> OptimizationJob:
+    """
+    Queue an optimization job, reusing an in-flight or recently finished job
+    for the same problem instead of solving it again
+    """
+    from eyefleet.apps.scheduling.tasks import run_optimization_job
+
+    digest = problem_hash(kind, parameters)
+    expire_stale_jobs(digest)
+
+    # Identical problem already queued or being solved
+    job = _active_job(digest)
+    if job:
+        return job
+
+    # Identical problem solved recently enough to reuse the result
+    job = OptimizationJob.objects.filter(
+        problem_hash=digest,
+        status='completed',
+        finished_at__gte=timezone.now() - timedelta(seconds=RESULT_TTL)
+    ).first()
+    if job:
+        return job
+
+    try:
+        with transaction.atomic():
+            job = OptimizationJob.objects.create(
+                kind=kind,
+                problem_hash=digest,
+                parameters=parameters
+            )
+    except IntegrityError:
+        # A concurrent submit created the active job first; share it
+        job = _active_job(digest)
+        if job:
+            return job
+        raise
+
+    # Only hand the job to a worker once its row is committed
+    transaction.on_commit(lambda: run_optimization_job.delay(str(job.id)))
+    return job
+
+
+def _active_job(digest: str):
+    return OptimizationJob.objects.filter(
+        problem_hash=digest,
+        status__in=['pending', 'running']
+    ).first()
+
+
+def expire_stale_jobs(digest: str = None) -> int:
+    """
+    Fail jobs that have been queued or running for longer than JOB_TIMEOUT,
+    so a lost job doesn't block its problem from being solved again
+    """
+    cutoff = timezone.now() - timedelta(seconds=JOB_TIMEOUT)
+    jobs = OptimizationJob.objects.filter(
+        Q(status='pending', created_at__lt=cutoff) |
+        Q(status='running', started_at__lt=cutoff)
+    )
+    if digest:
+        jobs = jobs.filter(problem_hash=digest)
+    return jobs.update(
+        status='failed',
+        error=f'Timed out after {JOB_TIMEOUT} seconds',
+        finished_at=timezone.now()
+    )
+
+
+def run_job(job_id: str):
+    """
+    Solve a queued job and store its result
+    """
+    # Claim the job atomically so only one worker ever runs it
+    claimed = OptimizationJob.objects.filter(id=job_id, status='pending').update(
+        status='running',
+        started_at=timezone.now()
+    )
+    if not claimed:
+        return
+
+    job = OptimizationJob.objects.get(id=job_id)
+    publish_job_update(job)
+
+    runners = {
+        'optimize_schedules': _optimize_schedules,
+        'create_schedule': _create_schedule,
+        'optimize_route': _optimize_route,
+        'optimize_fleet': _optimize_fleet,
+    }
+
+    try:
+        result = runners[job.kind](job)
+        if result is None or 'error' in result:
+            job.status = 'failed'
+            job.error = result['error'] if result else 'No feasible solution found'
+        else:
+            job.status = 'completed'
+            job.result = result
+    except Exception as e:
+        job.status = 'failed'
+        job.error = str(e)
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'finished_at'])
+    publish_job_update(job)
+
+
+def record_progress(job: OptimizationJob, progress: Dict[str, Any]):
+    """
+    Store the latest progress report on the job and push it to subscribers
+    """
+    job.progress = progress
+    OptimizationJob.objects.filter(id=job.id).update(progress=progress)
+    publish_job_update(job)
+
+
+def publish_job_update(job: OptimizationJob):
+    """
+    Broadcast the job's status to its websocket group
+    """
+    try:
+        channel_layer = get_channel_layer()
+        async_to_sync(channel_layer.group_send)(
+            f"optimization_job_{job.id}",
+            {
+                'type': 'send_job_update',
+                'message': json.loads(json.dumps({
+                    'job_id': str(job.id),
+                    'kind': job.kind,
+                    'status': job.status,
+                    'progress': job.progress,
+                    'error': job.error
+                }, cls=DjangoJSONEncoder))
+            }
+        )
+    except Exception as e:
+        logger.warning("failed to broadcast optimization job update via websocket: %s", e)
+
+
+def _optimize_schedules(job: OptimizationJob) -> Dict:
+    parameters = job.parameters
+    missions = Mission.objects.filter(
+        id__in=parameters['mission_ids'],
+        status='active'
+    )
+    available_assets = Asset.objects.filter(AVAILABLE_STATUS)
+
+    if not missions or not available_assets:
+        return {'error': 'No missions or available assets found'}
+
+    optimizer = MissionOptimizer()
+    return optimizer.optimize_mission_schedules(
+        missions=missions,
+        available_assets=available_assets,
+        time_window_start=datetime.fromisoformat(parameters['start_date']),
+        time_window_end=datetime.fromisoformat(parameters['end_date'])
+    )
+
+
+def _create_schedule(job: OptimizationJob) -> Dict:
+    parameters = job.parameters
+    scheduler = MissionScheduler()
+    return scheduler.schedule_missions(
+        start_date=datetime.fromisoformat(parameters['start_date']),
+        end_date=datetime.fromisoformat(parameters['end_date']),
+        recurrence_type=parameters.get('recurrence_type'),
+        mission_ids=parameters['mission_ids']
+    )
+
+
+def _optimize_route(job: OptimizationJob) -> Dict:
+    parameters = job.parameters
+    schedule = MissionSchedule.objects.select_related(
+        'reference_mission', 'vehicle'
+    ).get(pk=parameters['schedule_id'])
+    scheduler = MissionScheduler()
+    publish_route = scheduler.publish_route_progress(schedule.id)
+
+    # Improving routes go both to the route socket and onto the job itself
+    def on_solution(progress: Dict):
+        publish_route(progress)
+        record_progress(job, progress)
+
+    return scheduler.optimize_mission_route(
+        mission=schedule.reference_mission,
+        schedule=schedule,
+        time_limit=parameters.get('time_limit', 30),
+        warm_start=parameters.get('warm_start', True),
+        on_solution=on_solution
+    )
+
+
+def _optimize_fleet(job: OptimizationJob) -> Dict:
+    parameters = job.parameters
+    scheduler = MissionScheduler()
+    return scheduler.optimize_fleet_routes(
+        date=datetime.fromisoformat(parameters['date']).date(),
+        schedule_ids=parameters.get('schedule_ids', [])
+    )
@@ -0,0 +1,122 @@
+from django.core.management.base import BaseCommand
+from ortools.sat.python import cp_model
+import random
+import time
+
+from eyefleet.apps.scheduling.scheduler import MissionOptimizer
+
+
+def build_pairwise_model(model, mission_ids, compatible_assets, num_assets, horizon, max_mission_duration):
+    """
+    Reference copy of the original formulation: an integer asset variable per
+    mission and a reified no-overlap constraint for every pair of missions
+    """
+    mission_starts = {}
+    mission_ends = {}
+    mission_assets = {}
+
+    for mission_id in mission_ids:
+        mission_starts[mission_id] = model.NewIntVar(0, horizon, f'start_{mission_id}')
+        mission_ends[mission_id] = model.NewIntVar(0, horizon, f'end_{mission_id}')
+        mission_assets[mission_id] = model.NewIntVar(0, num_assets - 1, f'asset_{mission_id}')
+
+    for mission_id in mission_ids:
+        model.Add(mission_ends[mission_id] - mission_starts[mission_id] <= max_mission_duration)
+        model.Add(mission_ends[mission_id] > mission_starts[mission_id])
+
+    for i, mission1 in enumerate(mission_ids):
+        for mission2 in mission_ids[i + 1:]:
+            asset_same = model.NewBoolVar('asset_same')
+            model.Add(mission_assets[mission1] == mission_assets[mission2]).OnlyEnforceIf(asset_same)
+
+            no_overlap = model.NewBoolVar('no_overlap')
+            model.Add(mission_ends[mission1] <= mission_starts[mission2]).OnlyEnforceIf(no_overlap)
+            model.Add(mission_ends[mission2] <= mission_starts[mission1]).OnlyEnforceIf(no_overlap.Not())
+
+            model.AddImplication(asset_same, no_overlap)
+
+    for mission_id in mission_ids:
+        for asset_idx in range(num_assets):
+            if asset_idx not in compatible_assets[mission_id]:
+                model.Add(mission_assets[mission_id] != asset_idx)
+
+    max_completion = model.NewIntVar(0, horizon, 'max_completion')
+    for mission_id in mission_ids:
+        model.Add(max_completion >= mission_ends[mission_id])
+    model.Minimize(max_completion)
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks model size and solve time of the mission scheduling formulations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missions', type=int, nargs='+', default=[100, 500, 2000])
+        parser.add_argument('--assets', type=int, default=20)
+        parser.add_argument('--horizon', type=int, default=7 * 24 * 60,
+                            help='Scheduling horizon in minutes')
+        parser.add_argument('--compatibility', type=float, default=0.5,
+                            help='Probability that an asset can handle a mission')
+        parser.add_argument('--time-limit', type=float, default=60.0,
+                            help='Solver time limit per run in seconds')
+        parser.add_argument('--skip-pairwise-above', type=int, default=None,
+                            help='Skip the pairwise formulation above this many missions')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        self.stdout.write(
+            f"{'formulation':<12}{'missions':>10}{'variables':>12}{'constraints':>13}"
+            f"{'build (s)':>11}{'solve (s)':>11}{'status':>10}{'objective':>11}"
+        )
+
+        for num_missions in options['missions']:
+            mission_ids = [f'M{i:05d}' for i in range(num_missions)]
+
+            # Every mission can use a random subset of the assets (at least one)
+            compatible_assets = {}
+            for mission_id in mission_ids:
+                assets = [
+                    asset_idx for asset_idx in range(options['assets'])
+                    if random.random() < options['compatibility']
+                ]
+                compatible_assets[mission_id] = assets or [random.randrange(options['assets'])]
+
+            self.run_interval(mission_ids, compatible_assets, options)
+
+            skip_above = options['skip_pairwise_above']
+            if skip_above is None or num_missions <= skip_above:
+                self.run_pairwise(mission_ids, compatible_assets, options)
+
+    def run_interval(self, mission_ids, compatible_assets, options):
+        optimizer = MissionOptimizer()
+        started = time.perf_counter()
+        optimizer.build_model(mission_ids, compatible_assets, options['horizon'])
+        build_time = time.perf_counter() - started
+        self.report('interval', len(mission_ids), optimizer.model, build_time, options)
+
+    def run_pairwise(self, mission_ids, compatible_assets, options):
+        model = cp_model.CpModel()
+        started = time.perf_counter()
+        build_pairwise_model(
+            model, mission_ids, compatible_assets, options['assets'], options['horizon'], 480
+        )
+        build_time = time.perf_counter() - started
+        self.report('pairwise', len(mission_ids), model, build_time, options)
+
+    def report(self, formulation, num_missions, model, build_time, options):
+        proto = model.Proto()
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = options['time_limit']
+
+        started = time.perf_counter()
+        status = solver.Solve(model)
+        solve_time = time.perf_counter() - started
+
+        objective = (
+            f"{solver.ObjectiveValue():.0f}"
+            if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else '-'
+        )
+        self.stdout.write(
+            f"{formulation:<12}{num_missions:>10}{len(proto.variables):>12}{len(proto.constraints):>13}"
+            f"{build_time:>11.2f}{solve_time:>11.2f}{solver.StatusName(status):>10}{objective:>11}"
+        )
@@ -0,0 +1,34 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduling', '0002_alter_client_case_ref_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OptimizationJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('optimize_schedules', 'Optimize Schedules'), ('create_schedule', 'Create Schedule'), ('optimize_route', 'Optimize Route'), ('optimize_fleet', 'Optimize Fleet')], max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('problem_hash', models.CharField(max_length=64)),
+                ('parameters', models.JSONField(default=dict, encoder=DjangoJSONEncoder)),
+                ('progress', models.JSONField(blank=True, encoder=DjangoJSONEncoder, null=True)),
+                ('result', models.JSONField(blank=True, encoder=DjangoJSONEncoder, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'optimization_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['problem_hash', 'status'], name='optimization_job_hash_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduling', '0003_optimizationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='schedule_occurrence',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduling', '0004_trip_schedule_occurrence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='missionschedule',
+            index=models.Index(fields=['status', 'next_occurrence'], name='mission_schedule_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['reference_schedule', 'schedule_occurrence'], name='trip_schedule_occurrence_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(
+                condition=models.Q(('status__in', ['scheduled', 'ongoing'])),
+                fields=['vehicle', 'end_time'],
+                name='trip_live_vehicle_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    """Keep only the newest queued or running job per problem so the constraint can be added"""
+    OptimizationJob = apps.get_model('scheduling', 'OptimizationJob')
+    active = OptimizationJob.objects.filter(status__in=['pending', 'running'])
+    duplicated = active.values('problem_hash').annotate(count=Count('pk')).filter(count__gt=1)
+    for row in duplicated:
+        newest = active.filter(problem_hash=row['problem_hash']).order_by('-created_at').first()
+        active.filter(problem_hash=row['problem_hash']).exclude(pk=newest.pk).update(
+            status='failed',
+            error='Superseded by a duplicate job',
+            finished_at=timezone.now()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduling', '0005_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='optimizationjob',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('status__in', ['pending', 'running'])),
+                fields=('problem_hash',),
+                name='optimization_job_active_hash_uniq'
+            ),
+        ),
+    ]
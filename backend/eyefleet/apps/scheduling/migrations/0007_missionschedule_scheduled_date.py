@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduling', '0006_optimizationjob_active_hash_uniq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='missionschedule',
+            name='scheduled_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
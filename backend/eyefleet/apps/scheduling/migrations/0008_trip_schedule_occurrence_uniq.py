@@ -0,0 +1,41 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def detach_duplicate_trips(apps, schema_editor):
+    """Keep one trip per schedule occurrence so the constraint can be added
+
+    The extra trips are kept as standalone trips rather than deleted.
+    """
+    Trip = apps.get_model('scheduling', 'Trip')
+    linked = Trip.objects.filter(reference_schedule__isnull=False, schedule_occurrence__isnull=False)
+    duplicated = linked.values('reference_schedule', 'schedule_occurrence').annotate(count=Count('pk')).filter(count__gt=1)
+    for row in duplicated:
+        trips = linked.filter(
+            reference_schedule=row['reference_schedule'],
+            schedule_occurrence=row['schedule_occurrence']
+        ).order_by('pk')
+        kept = trips.first()
+        trips.exclude(pk=kept.pk).update(schedule_occurrence=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduling', '0007_missionschedule_scheduled_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(detach_duplicate_trips, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='trip',
+            name='trip_schedule_occurrence_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='trip',
+            constraint=models.UniqueConstraint(
+                fields=('reference_schedule', 'schedule_occurrence'),
+                name='trip_schedule_occurrence_uniq'
+            ),
+        ),
+    ]
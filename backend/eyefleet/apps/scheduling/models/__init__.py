@@ -3,6 +3,7 @@ from .cargo import Cargo
 from .clients import CLIENT_SOURCE_CHOICES, CLIENT_SERVICE_CHOICES, CLIENT_STATUS_CHOICES
 from .schedules import MissionSchedule, Trip
 from .pilots import Pilot
+from .jobs import OptimizationJob, OPTIMIZATION_JOB_KIND_CHOICES, OPTIMIZATION_JOB_STATUS_CHOICES
 
 __all__ = [
     'Mission',
@@ -18,4 +19,7 @@ __all__ = [
     'CLIENT_SERVICE_CHOICES', 
     'CLIENT_STATUS_CHOICES',
     'Pilot',
+    'OptimizationJob',
+    'OPTIMIZATION_JOB_KIND_CHOICES',
+    'OPTIMIZATION_JOB_STATUS_CHOICES',
 ]
@@ -0,0 +1,60 @@
+from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+import uuid
+
+# Define optimization job kind choices
+OPTIMIZATION_JOB_KIND_CHOICES = [
+    ('optimize_schedules', 'Optimize Schedules'),
+    ('create_schedule', 'Create Schedule'),
+    ('optimize_route', 'Optimize Route'),
+    ('optimize_fleet', 'Optimize Fleet')
+]
+
+# Define optimization job status choices
+OPTIMIZATION_JOB_STATUS_CHOICES = [
+    ('pending', 'Pending'),
+    ('running', 'Running'),
+    ('completed', 'Completed'),
+    ('failed', 'Failed')
+]
+
+class OptimizationJob(models.Model):
+    """An optimization request queued for a Celery worker, and its result"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    kind = models.CharField(max_length=50, choices=OPTIMIZATION_JOB_KIND_CHOICES)
+    status = models.CharField(
+        max_length=20,
+        choices=OPTIMIZATION_JOB_STATUS_CHOICES,
+        default='pending'
+    )
+
+    # identical problems share a hash so in-flight and finished jobs can be reused
+    problem_hash = models.CharField(max_length=64)
+    parameters = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    progress = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'optimization_jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['problem_hash', 'status'], name='optimization_job_hash_idx'),
+        ]
+        constraints = [
+            # At most one queued or running job per problem, even under concurrent submits
+            models.UniqueConstraint(
+                fields=['problem_hash'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='optimization_job_active_hash_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.id}-{self.status}"
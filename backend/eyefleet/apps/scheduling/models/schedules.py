@@ -55,15 +55,25 @@ class MissionSchedule(models.Model):
     assigned_by = models.CharField(max_length=100, null=True, blank=True)
 
     next_occurrence = models.DateTimeField(null=True, blank=True)
+    # Day a one-time schedule runs; it keeps no next_occurrence once its trip exists
+    scheduled_date = models.DateField(null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Due recurring schedules: status in (...) and next_occurrence <= now
+            models.Index(fields=['status', 'next_occurrence'], name='mission_schedule_due_idx'),
+        ]
+
 
 class Trip(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     reference_mission = models.ForeignKey(Mission, on_delete=models.PROTECT, null=True, blank=True)
     reference_schedule = models.ForeignKey(MissionSchedule, on_delete=models.PROTECT, null=True, blank=True)
+    # the recurrence occurrence of reference_schedule this trip materializes
+    schedule_occurrence = models.DateTimeField(null=True, blank=True)
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
     source = models.CharField(max_length=255)
@@ -78,6 +88,22 @@ class Trip(models.Model):
 
     class Meta:
         db_table = 'mission_logs'
+        constraints = [
+            # At most one trip per schedule occurrence; its index also finds
+            # the trips already materialized for a schedule
+            models.UniqueConstraint(
+                fields=['reference_schedule', 'schedule_occurrence'],
+                name='trip_schedule_occurrence_uniq'
+            ),
+        ]
+        indexes = [
+            # Live bookings per vehicle for conflict checks
+            models.Index(
+                fields=['vehicle', 'end_time'],
+                name='trip_live_vehicle_idx',
+                condition=models.Q(status__in=['scheduled', 'ongoing'])
+            ),
+        ]
 
     def __str__(self):
         return f"ML:{self.reference_mission_id}-{self.start_time}-{self.end_time}-{self.source}-{self.destination}-{self.driver}-{self.status}"
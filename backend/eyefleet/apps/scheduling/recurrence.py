@@ -0,0 +1,144 @@
+import heapq
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dateutil.rrule import rrule, DAILY, WEEKLY, MONTHLY, YEARLY
+
+from .models.schedules import MissionSchedule, Trip
+
+# rrule frequency for each MissionSchedule.recurrence value
+RECURRENCE_FREQUENCIES = {
+    'daily': DAILY,
+    'weekly': WEEKLY,
+    'monthly': MONTHLY,
+    'yearly': YEARLY,
+}
+
+# Upper bound on occurrences expanded for one schedule in one pass
+MAX_OCCURRENCES = 1000
+
+
+def schedule_rule(schedule: MissionSchedule, dtstart: datetime = None) -> Optional[rrule]:
+    """The schedule's recurrence as an rrule anchored on its next occurrence
+
+    Returns None for one-time schedules or schedules without a next occurrence.
+    Monthly and yearly rules are calendar-correct: a schedule on the 31st
+    only recurs in months that have one, as with iCalendar RRULEs.
+    """
+    frequency = RECURRENCE_FREQUENCIES.get(schedule.recurrence)
+    dtstart = dtstart or schedule.next_occurrence
+    if frequency is None or dtstart is None:
+        return None
+    return rrule(frequency, dtstart=dtstart)
+
+
+def occurrences_between(schedule: MissionSchedule, start: datetime, end: datetime) -> Iterator[datetime]:
+    """Yield the schedule's occurrences in [start, end] without touching the database"""
+    rule = schedule_rule(schedule)
+    if rule is None:
+        # A one-time schedule occurs once, at its next occurrence
+        if schedule.next_occurrence is not None and start <= schedule.next_occurrence <= end:
+            yield schedule.next_occurrence
+        return
+    for occurrence in rule.xafter(start, inc=True):
+        if occurrence > end:
+            return
+        yield occurrence
+
+
+def due_occurrences(schedule: MissionSchedule, now: datetime) -> Tuple[List[datetime], Optional[datetime]]:
+    """Every occurrence that is due by now, and the one that follows
+
+    Includes occurrences missed while the task wasn't running, so a schedule
+    that was last expanded three days ago yields three daily occurrences.
+    """
+    if schedule.next_occurrence is None or schedule.next_occurrence > now:
+        return [], schedule.next_occurrence
+
+    rule = schedule_rule(schedule)
+    if rule is None:
+        # One-time schedules run once and are then done
+        return [schedule.next_occurrence], None
+
+    due = []
+    for occurrence in rule:
+        if occurrence > now or len(due) >= MAX_OCCURRENCES:
+            return due, occurrence
+        due.append(occurrence)
+    return due, None
+
+
+def occurrence_window(schedule: MissionSchedule, occurrence: datetime) -> Tuple[datetime, datetime]:
+    """Start and end datetimes of a schedule on the day of an occurrence"""
+    start_time = datetime.combine(occurrence.date(), schedule.start_time, tzinfo=occurrence.tzinfo)
+    end_time = datetime.combine(occurrence.date(), schedule.end_time, tzinfo=occurrence.tzinfo)
+    # Night shifts finish the next morning
+    if end_time <= start_time:
+        end_time += timedelta(days=1)
+    return start_time, end_time
+
+
+def trip_fields(schedule: MissionSchedule, occurrence: datetime) -> Dict:
+    """Field values of the trip for one occurrence of a schedule
+
+    Expects reference_mission, vehicle and the mission's assigned_employees
+    to be loaded already when building many trips.
+    """
+    start_time, end_time = occurrence_window(schedule, occurrence)
+    stop_points = schedule.stop_points or []
+    return {
+        'reference_mission': schedule.reference_mission,
+        'reference_schedule': schedule,
+        'schedule_occurrence': occurrence,
+        'start_time': start_time,
+        'end_time': end_time,
+        'source': stop_points[0].get('location', '') if stop_points else '',
+        'destination': stop_points[-1].get('location', '') if stop_points else '',
+        'driver': schedule.driver or '',
+        'vehicle': schedule.vehicle,
+        'staff': [
+            employee.employee
+            for employee in schedule.reference_mission.assigned_employees.all()
+        ],
+        'passengers': [],
+        'status': 'scheduled'
+    }
+
+
+def build_trip(schedule: MissionSchedule, occurrence: datetime) -> Trip:
+    """An unsaved trip for one occurrence of a schedule (see trip_fields)"""
+    return Trip(**trip_fields(schedule, occurrence))
+
+
+def timeline(schedules: Iterable[MissionSchedule], start: datetime, end: datetime,
+             trips: Dict[Tuple[str, datetime], Trip] = None) -> Iterator[Dict]:
+    """Yield every occurrence of the schedules in [start, end], ordered by start time
+
+    Occurrences are computed on the fly; nothing is written. Occurrences that
+    already have a trip (keyed by schedule id and occurrence) are reported
+    as that materialized trip instead.
+    """
+    trips = trips or {}
+
+    def entries(schedule):
+        for occurrence in occurrences_between(schedule, start, end):
+            start_time, end_time = occurrence_window(schedule, occurrence)
+            trip = trips.get((schedule.id, occurrence))
+            yield {
+                'schedule_id': schedule.id,
+                'mission_id': schedule.reference_mission_id,
+                'occurrence': occurrence,
+                'start_time': trip.start_time if trip else start_time,
+                'end_time': trip.end_time if trip else end_time,
+                'vehicle_id': trip.vehicle_id if trip else schedule.vehicle_id,
+                'driver': trip.driver if trip else schedule.driver,
+                'status': trip.status if trip else 'scheduled',
+                'trip_id': trip.id if trip else None,
+                'materialized': trip is not None
+            }
+
+    # Each schedule's occurrences are already sorted, so merge them lazily
+    yield from heapq.merge(
+        *(entries(schedule) for schedule in schedules),
+        key=lambda entry: (entry['start_time'], entry['schedule_id'])
+    )
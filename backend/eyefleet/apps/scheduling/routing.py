@@ -0,0 +1,15 @@
+from django.urls import re_path
+from eyefleet.apps.scheduling.consumer import RouteOptimizationConsumer, OptimizationJobConsumer
+
+websocket_urlpatterns = [
+    re_path(
+        r"ws/scheduling/route-optimization/(?P<schedule_id>[^/]+)/$",
+        RouteOptimizationConsumer.as_asgi(),
+        name="route-optimization",
+    ),
+    re_path(
+        r"ws/scheduling/optimization-jobs/(?P<job_id>[^/]+)/$",
+        OptimizationJobConsumer.as_asgi(),
+        name="optimization-jobs",
+    ),
+]
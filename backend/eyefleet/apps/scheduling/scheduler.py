@@ -1,20 +1,29 @@
 from ortools.sat.python import cp_model
 
 # Import typing hints to help with code readability and error checking
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Callable
 
 # Import date/time utilities for handling schedules
 from datetime import datetime, timedelta
+import logging
+import time
+import uuid
 
 # Import Django's timezone utilities for handling timezone-aware dates
 from django.utils import timezone
-from django.db.models import Avg, Count
+from django.db import transaction
+from django.db.models import Avg, Count, Q
 
 # Import our custom models that represent database tables
 from .models.missions import Mission
 from .models.schedules import MissionSchedule, Trip
 from .models.cargo import Cargo
-from eyefleet.apps.maintenance.models.assets import Asset
+from .compatibility import build_compatibility_matrix
+from .recurrence import due_occurrences, build_trip
+from .conflicts import conflict_index, resources_for
+from eyefleet.apps.core.solver import SolverService
+from eyefleet.apps.core.versions import bump_table_version
+from eyefleet.apps.maintenance.models.assets import AVAILABLE_STATUS, Asset
 # Import libraries for route optimization
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
@@ -22,13 +31,19 @@ import numpy as np
 from dataclasses import dataclass
 import googlemaps  # For calculating real driving distances/times
 from django.conf import settings
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+
+logger = logging.getLogger(__name__)
 
 # Main class for optimizing mission schedules
 class MissionOptimizer:
     def __init__(self):
         # Create a new constraint programming model and solver when initialized
         self.model = cp_model.CpModel()
-        self.solver = cp_model.CpSolver()
+        # Shared solver configuration; every solve is recorded
+        self.solver_service = SolverService('mission_schedule')
+        self.solver = self.solver_service.solver
 
     def optimize_mission_schedules(
         self,
@@ -36,82 +51,39 @@ class MissionOptimizer:
         available_assets: List[Asset],  # List of vehicles/assets available
         time_window_start: datetime,  # When scheduling period starts
         time_window_end: datetime,  # When scheduling period ends
-        max_mission_duration: int = 480  # Maximum mission length (8 hours in minutes)
+        max_mission_duration: int = 480,  # Maximum mission length (8 hours in minutes)
+        recurrence_type: str = None  # Recurrence to store on the new schedules
     ) -> Dict[str, List[Dict]]:
         """
         This method takes missions and tries to schedule them optimally with available assets.
         It returns a dictionary with the optimized schedules.
         """
-        
+        missions = list(missions)
+        available_assets = list(available_assets)
+
         # Convert the time window to minutes for easier calculations
         horizon = int((time_window_end - time_window_start).total_seconds() / 60)
-        
-        # Create dictionaries to store our decision variables
-        mission_starts = {}  # When each mission starts
-        mission_ends = {}    # When each mission ends
-        mission_assets = {}  # Which asset is assigned to each mission
-        
-        # For each mission, create variables to track start time, end time, and assigned asset
-        for mission in missions:
-            # Create variable for mission start time (can be anywhere from 0 to horizon)
-            mission_starts[mission.id] = self.model.NewIntVar(
-                0, horizon, f'start_{mission.id}'
-            )
-            
-            # Create variable for mission end time
-            mission_ends[mission.id] = self.model.NewIntVar(
-                0, horizon, f'end_{mission.id}'
-            )
-            
-            # Create variable for asset assignment (can be any available asset)
-            mission_assets[mission.id] = self.model.NewIntVar(
-                0, len(available_assets) - 1, f'asset_{mission.id}'
-            )
 
-        # Add constraints to make sure schedules are feasible
-
-        # 1. Make sure missions don't exceed maximum duration
-        for mission in missions:
-            self.model.Add(
-                mission_ends[mission.id] - mission_starts[mission.id] <= max_mission_duration
-            )
-            self.model.Add(mission_ends[mission.id] > mission_starts[mission.id])
-
-        # 2. Make sure missions using the same asset don't overlap
-        for i, mission1 in enumerate(missions):
-            for mission2 in missions[i + 1:]:
-                # Create variable to track if missions use same asset
-                asset_same = self.model.NewBoolVar('asset_same')
-                self.model.Add(
-                    mission_assets[mission1.id] == mission_assets[mission2.id]
-                ).OnlyEnforceIf(asset_same)
-                
-                # Create variable to track if missions don't overlap
-                no_overlap = self.model.NewBoolVar('no_overlap')
-                self.model.Add(
-                    mission_ends[mission1.id] <= mission_starts[mission2.id]
-                ).OnlyEnforceIf(no_overlap)
-                self.model.Add(
-                    mission_ends[mission2.id] <= mission_starts[mission1.id]
-                ).OnlyEnforceIf(no_overlap.Not())
-                
-                # If missions use same asset, they cannot overlap
-                self.model.AddImplication(asset_same, no_overlap)
+        # Prune incompatible mission/asset pairs before building the model
+        compatible = build_compatibility_matrix(missions, available_assets)
+        compatible_assets = {
+            mission.id: np.flatnonzero(compatible[i]).tolist()
+            for i, mission in enumerate(missions)
+        }
 
-        # 3. Make sure assets are capable of handling assigned missions
-        for mission in missions:
-            for i, asset in enumerate(available_assets):
-                if not self._check_asset_capability(mission, asset):
-                    self.model.Add(mission_assets[mission.id] != i)
+        # A mission that no asset can handle makes the whole problem infeasible
+        if any(not assets for assets in compatible_assets.values()):
+            return None
 
-        # Set objective: Try to complete all missions as early as possible
-        max_completion = self.model.NewIntVar(0, horizon, 'max_completion')
-        for mission in missions:
-            self.model.Add(max_completion >= mission_ends[mission.id])
-        self.model.Minimize(max_completion)
+        mission_starts, mission_ends, mission_assets = self.build_model(
+            [mission.id for mission in missions],
+            compatible_assets,
+            horizon,
+            max_mission_duration
+        )
 
         # Try to solve the optimization problem
-        status = self.solver.Solve(self.model)
+        status = self.solver_service.solve(self.model)
         
         # If we found a solution, create and return the schedules
         if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
@@ -121,27 +93,65 @@ class MissionOptimizer:
                 mission_starts,
                 mission_ends,
                 mission_assets,
-                time_window_start
+                time_window_start,
+                recurrence_type
             )
         
         # If no solution found, return None
         return None
 
-    def _check_asset_capability(self, mission: Mission, asset: Asset) -> bool:
+    def build_model(
+        self,
+        mission_ids: List[str],
+        compatible_assets: Dict[str, List[int]],  # Asset indexes each mission may use
+        horizon: int,
+        max_mission_duration: int = 480
+    ) -> Tuple[Dict, Dict, Dict]:
         """
-        Check if an asset can handle a mission by comparing cargo weight/volume
-        to asset capacity
+        Build the scheduling model on a fresh CpModel.
+
+        Every mission gets one optional interval per compatible asset, and the
+        intervals on each asset may not overlap. The model therefore grows with
+        missions x compatible assets rather than with pairs of missions.
+        Returns the start, end and asset-presence variables per mission.
         """
-        # Calculate total weight and volume of all cargo in the mission
-        total_cargo_weight = sum(cargo.weight or 0 for cargo in mission.cargos.all())
-        total_cargo_volume = sum(cargo.volume or 0 for cargo in mission.cargos.all())
-        
-        # Return True if asset can handle the mission
-        return (
-            asset.status == 'available' and
-            asset.capacity_weight >= total_cargo_weight and
-            asset.capacity_volume >= total_cargo_volume
-        )
+        self.model = cp_model.CpModel()
+
+        mission_starts = {}  # When each mission starts
+        mission_ends = {}    # When each mission ends
+        mission_assets = {}  # Presence literal for each compatible asset of a mission
+        asset_intervals = {}  # Optional intervals placed on each asset
+
+        for mission_id in mission_ids:
+            # Create variables for mission start, duration and end time
+            start = self.model.NewIntVar(0, horizon, f'start_{mission_id}')
+            duration = self.model.NewIntVar(1, max_mission_duration, f'duration_{mission_id}')
+            end = self.model.NewIntVar(0, horizon, f'end_{mission_id}')
+            self.model.Add(end == start + duration)
+            mission_starts[mission_id] = start
+            mission_ends[mission_id] = end
+
+            # One optional interval per compatible asset; exactly one is used
+            mission_assets[mission_id] = {}
+            for asset_idx in compatible_assets[mission_id]:
+                present = self.model.NewBoolVar(f'asset_{mission_id}_{asset_idx}')
+                interval = self.model.NewOptionalIntervalVar(
+                    start, duration, end, present, f'interval_{mission_id}_{asset_idx}'
+                )
+                mission_assets[mission_id][asset_idx] = present
+                asset_intervals.setdefault(asset_idx, []).append(interval)
+            self.model.AddExactlyOne(mission_assets[mission_id].values())
+
+        # Missions using the same asset cannot overlap
+        for intervals in asset_intervals.values():
+            self.model.AddNoOverlap(intervals)
+
+        # Set objective: Try to complete all missions as early as possible
+        max_completion = self.model.NewIntVar(0, horizon, 'max_completion')
+        self.model.AddMaxEquality(max_completion, list(mission_ends.values()))
+        self.model.Minimize(max_completion)
+
+        return mission_starts, mission_ends, mission_assets
 
     def _create_schedule_output(
         self,
@@ -150,12 +160,18 @@ class MissionOptimizer:
         mission_starts: Dict,
         mission_ends: Dict,
         mission_assets: Dict,
-        time_window_start: datetime
+        time_window_start: datetime,
+        recurrence_type: str = None
     ) -> Dict[str, List[Dict]]:
         """
         Convert the optimization results into actual schedule objects in the database
+
+        The new plan is written in one transaction: earlier scheduled plans for
+        the same missions are cancelled, and the new schedules and their cargo
+        links are bulk inserted, so readers never see a half-written plan.
         """
         schedules = []
+        new_schedules = []
         
         # For each mission, create a schedule with the optimized times and asset
         for mission in missions:
@@ -167,12 +183,15 @@ class MissionOptimizer:
                 minutes=self.solver.Value(mission_ends[mission.id])
             )
             # Get the assigned asset
-            assigned_asset = available_assets[
-                self.solver.Value(mission_assets[mission.id])
-            ]
+            assigned_asset = available_assets[next(
+                asset_idx for asset_idx, present in mission_assets[mission.id].items()
+                if self.solver.BooleanValue(present)
+            )]
             
-            # Create a new schedule in the database
-            schedule = MissionSchedule.objects.create(
+            # Build the new schedule; it is saved with the rest of the plan below
+            schedule = MissionSchedule(
+                id=self._new_schedule_id(),
+                shift=self._shift_for(start_time),
                 reference_mission=mission,
                 vehicle=assigned_asset,
                 start_time=start_time.time(),
@@ -180,11 +199,12 @@ class MissionOptimizer:
                 status='scheduled',
                 estimated_duration=str(end_time - start_time),
                 deliveries=mission.stops,
-                total_stops=mission.stops
+                total_stops=mission.stops,
+                recurrence=recurrence_type,
+                next_occurrence=start_time if recurrence_type else None,
+                scheduled_date=start_time.date() if recurrence_type in (None, '', 'one_time') else None
             )
-            
-            # Associate cargos with the schedule
-            schedule.cargos.set(mission.cargos.all())
+            new_schedules.append(schedule)
             
             # Add schedule details to our results
             schedules.append({
@@ -198,6 +218,8 @@ class MissionOptimizer:
                 )
             })
             
+        self._save_plan(missions, new_schedules)
+
         # Return all schedules with optimization status
         return {
             'status': 'optimal' if self.solver.StatusName() == 'OPTIMAL' else 'feasible',
@@ -205,6 +227,66 @@ class MissionOptimizer:
         }
     
 
+    def _save_plan(self, missions: List[Mission], new_schedules: List[MissionSchedule]):
+        """Replace the missions' scheduled plans with the new schedules atomically"""
+        mission_ids = [mission.id for mission in missions]
+
+        # Cargo links for every mission in one query
+        mission_cargos = Mission.cargos.through.objects.filter(
+            mission_id__in=mission_ids
+        ).values_list('mission_id', 'cargo_id')
+        cargo_ids = {}
+        for mission_id, cargo_id in mission_cargos:
+            cargo_ids.setdefault(mission_id, []).append(cargo_id)
+
+        schedule_cargos = [
+            MissionSchedule.cargos.through(missionschedule_id=schedule.id, cargo_id=cargo_id)
+            for schedule in new_schedules
+            for cargo_id in cargo_ids.get(schedule.reference_mission_id, [])
+        ]
+
+        with transaction.atomic():
+            # Supersede the previous plans (trips may still reference them, so
+            # they are cancelled rather than deleted)
+            superseded = MissionSchedule.objects.filter(
+                reference_mission_id__in=mission_ids,
+                status='scheduled'
+            )
+            superseded_resources = [
+                resource
+                for schedule in superseded.only('vehicle', 'driver')
+                for resource in resources_for(schedule)
+            ]
+            superseded.update(status='cancelled', updated_at=timezone.now())
+
+            MissionSchedule.objects.bulk_create(new_schedules)
+            MissionSchedule.cargos.through.objects.bulk_create(schedule_cargos)
+            # Nor do they bump table versions, which cached timelines key on
+            bump_table_version(MissionSchedule)
+            bump_table_version(MissionSchedule.cargos.through)
+
+        # Bulk writes skip signals, so refresh the conflict index explicitly
+        conflict_index.invalidate(superseded_resources + [
+            resource for schedule in new_schedules for resource in resources_for(schedule)
+        ])
+
+    @staticmethod
+    def _new_schedule_id() -> str:
+        # MissionSchedule ids are short strings with no default
+        return f'S{uuid.uuid4().hex[:12].upper()}'
+
+    @staticmethod
+    def _shift_for(start_time: datetime) -> str:
+        """Shift a schedule belongs to, from its start hour"""
+        if 5 <= start_time.hour < 12:
+            return 'morning'
+        if 12 <= start_time.hour < 17:
+            return 'afternoon'
+        if 17 <= start_time.hour < 21:
+            return 'evening'
+        return 'night'
+    
+
 # Define a class to represent each stop on a route
 @dataclass
 class Stop:
@@ -213,9 +295,30 @@ class Stop:
     time_window: Tuple[int, int]  # When customer wants delivery
     service_time: int  # How long it takes to service this stop
     demand: float  # How much cargo needs to be delivered
+    volume: float = 0  # How much cargo space the delivery takes up
+    group: str = None  # Stops sharing a group (e.g. a schedule) stay on one vehicle
+
+# Define a class to represent each vehicle available for fleet routing
+@dataclass
+class Vehicle:
+    id: str
+    depot: Dict[str, float]  # Where this vehicle starts and ends its day
+    capacity_weight: float  # How much weight the vehicle can carry
+    capacity_volume: float  # How much volume the vehicle can carry
+    time_window: Tuple[int, int] = (0, 24 * 60)  # When the vehicle can be on the road
 
 # Class for optimizing the sequence of stops on a route
 class RoutePathOptimizer:
+    # Maximum origins/destinations per Google Maps distance matrix request
+    MATRIX_BLOCK = 10
+
+    # Penalty for leaving a stop unserved in fleet routing; large enough that
+    # stops are only dropped when no vehicle can feasibly serve them
+    DROP_PENALTY = 100000
+
+    # Upper bound on the search budget a single request can ask for (seconds)
+    MAX_TIME_LIMIT = 300
+
     def __init__(self, api_key: str = settings.GOOGLE_MAPS_API_KEY):
         """Set up Google Maps client for distance calculations"""
         self.gmaps = googlemaps.Client(key=api_key)
@@ -226,10 +329,19 @@ class RoutePathOptimizer:
         stops: List[Stop],  # List of stops to visit
         vehicle_capacity: float,  # How much the vehicle can carry
         max_route_duration: int = 480,  # Maximum route length (8 hours)
-        start_time: datetime = None  # When route should start
+        start_time: datetime = None,  # When route should start
+        time_limit: int = 30,  # Search budget in seconds
+        initial_route: List[str] = None,  # Current stop order to warm-start from
+        on_solution: Callable[[Dict], None] = None  # Called with each improving solution
     ) -> Dict:
         """
         Find the best order to visit stops while respecting all constraints
+
+        The search is anytime: it returns the best route found within
+        time_limit, and reports every improving solution to on_solution as it
+        goes. When initial_route is given the search starts from that order
+        instead of building a first solution from scratch, so re-optimizing
+        after a small change converges much faster.
         """
         # Get the driving times/distances between all locations
         locations = [depot_location] + [stop.location for stop in stops]
@@ -304,10 +416,33 @@ class RoutePathOptimizer:
         search_parameters.local_search_metaheuristic = (
             routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
         )
-        search_parameters.time_limit.seconds = 30
+        budget = min(max(int(time_limit), 1), self.MAX_TIME_LIMIT)
+        search_parameters.time_limit.seconds = budget
 
-        # Try to find optimal route
-        solution = routing.SolveWithParameters(search_parameters)
+        # Report each improving solution while the search is still running
+        if on_solution:
+            routing.AddAtSolutionCallback(
+                self._solution_reporter(manager, routing, stops, on_solution)
+            )
+
+        # Warm-start from the current stop order when one is available
+        started = time.monotonic()
+        solution = None
+        initial_assignment = self._read_initial_assignment(
+            manager, routing, stops, initial_route, search_parameters
+        )
+        if initial_assignment:
+            solution = routing.SolveFromAssignmentWithParameters(
+                initial_assignment, search_parameters
+            )
+
+        # Fall back to building a first solution from scratch, within
+        # whatever is left of the budget after the warm start
+        if not solution:
+            remaining = budget - (time.monotonic() - started)
+            if remaining > 0:
+                search_parameters.time_limit.FromMilliseconds(int(remaining * 1000))
+                solution = routing.SolveWithParameters(search_parameters)
 
         if not solution:
             return None
@@ -323,6 +458,204 @@ class RoutePathOptimizer:
             start_time
         )
 
+    def _read_initial_assignment(
+        self,
+        manager,
+        routing,
+        stops: List[Stop],
+        initial_route: List[str],
+        search_parameters
+    ):
+        """
+        Turn a list of stop ids into a starting assignment for the solver
+        """
+        if not initial_route:
+            return None
+
+        # Map stop ids onto routing nodes, ignoring stops that no longer exist
+        node_by_stop = {stop.id: node for node, stop in enumerate(stops, 1)}
+        route = [node_by_stop[stop_id] for stop_id in initial_route if stop_id in node_by_stop]
+        if not route:
+            return None
+
+        # The model has to be closed before routes can be read into it
+        routing.CloseModelWithParameters(search_parameters)
+        return routing.ReadAssignmentFromRoutes([route], True)
+
+    def _solution_reporter(
+        self,
+        manager,
+        routing,
+        stops: List[Stop],
+        on_solution: Callable[[Dict], None]
+    ) -> Callable[[], None]:
+        """
+        Build a search callback that passes improving solutions to on_solution
+        """
+        started = time.monotonic()
+        best = {'objective': None}
+
+        def report():
+            objective = routing.CostVar().Value()
+            if best['objective'] is not None and objective >= best['objective']:
+                return
+            best['objective'] = objective
+
+            # Walk the route as it stands in the current solution
+            route = []
+            index = routing.Start(0)
+            while not routing.IsEnd(index):
+                node_index = manager.IndexToNode(index)
+                if node_index != 0:
+                    route.append(stops[node_index - 1].id)
+                index = routing.NextVar(index).Value()
+
+            on_solution({
+                'objective': objective,
+                'elapsed_seconds': round(time.monotonic() - started, 3),
+                'route': route
+            })
+
+        return report
+
+    def optimize_fleet_routes(
+        self,
+        vehicles: List[Vehicle],  # Vehicles available for the day
+        stops: List[Stop],  # Every stop to visit across the fleet
+        max_route_duration: int = 480,  # Maximum route length per vehicle (8 hours)
+        start_time: datetime = None  # Midnight of the day being planned
+    ) -> Dict:
+        """
+        Solve one capacitated VRP with time windows for the whole fleet.
+
+        Each vehicle starts and ends at its own depot and has its own weight and
+        volume capacity. Stops that share a group are kept on the same vehicle.
+        Stops that cannot be served by any vehicle are dropped and reported.
+        """
+        # Depots come first (one node per vehicle), followed by the stops
+        num_vehicles = len(vehicles)
+        locations = [vehicle.depot for vehicle in vehicles] + [stop.location for stop in stops]
+        distance_matrix, time_matrix = self._create_distance_matrix(locations)
+        depots = list(range(num_vehicles))
+
+        # Set up the routing problem with a start/end depot per vehicle
+        manager = pywrapcp.RoutingIndexManager(
+            len(locations),
+            num_vehicles,
+            depots,  # Where each vehicle starts
+            depots   # Where each vehicle ends
+        )
+        routing = pywrapcp.RoutingModel(manager)
+
+        def stop_at(node):
+            # Depot nodes have no stop attached
+            return stops[node - num_vehicles] if node >= num_vehicles else None
+
+        # Travel time between nodes plus the service time spent at the origin
+        def time_callback(from_index, to_index):
+            from_node = manager.IndexToNode(from_index)
+            to_node = manager.IndexToNode(to_index)
+            stop = stop_at(from_node)
+            service_time = stop.service_time if stop else 0
+            return time_matrix[from_node][to_node] + service_time
+
+        transit_callback_index = routing.RegisterTransitCallback(time_callback)
+        routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+
+        # Add one capacity dimension each for weight and volume
+        def weight_callback(from_index):
+            stop = stop_at(manager.IndexToNode(from_index))
+            return int(round(stop.demand)) if stop else 0
+
+        def volume_callback(from_index):
+            stop = stop_at(manager.IndexToNode(from_index))
+            return int(round(stop.volume)) if stop else 0
+
+        routing.AddDimensionWithVehicleCapacity(
+            routing.RegisterUnaryTransitCallback(weight_callback),
+            0,  # No slack
+            [int(vehicle.capacity_weight) for vehicle in vehicles],
+            True,  # Start empty
+            'Weight'
+        )
+        routing.AddDimensionWithVehicleCapacity(
+            routing.RegisterUnaryTransitCallback(volume_callback),
+            0,  # No slack
+            [int(vehicle.capacity_volume) for vehicle in vehicles],
+            True,  # Start empty
+            'Volume'
+        )
+
+        # Add time constraints over the whole day
+        time_dimension_name = 'Time'
+        routing.AddDimension(
+            transit_callback_index,
+            30,  # Allow waiting up to 30 minutes at stops
+            24 * 60,  # Cumulative times are minutes since midnight
+            False,  # Don't force start at time 0
+            time_dimension_name
+        )
+        time_dimension = routing.GetDimensionOrDie(time_dimension_name)
+
+        # Add time windows for each stop and allow dropping unservable stops
+        for node, stop in enumerate(stops, num_vehicles):
+            index = manager.NodeToIndex(node)
+            time_dimension.CumulVar(index).SetRange(
+                stop.time_window[0],
+                stop.time_window[1]
+            )
+            routing.AddDisjunction([index], self.DROP_PENALTY)
+
+        # Limit each vehicle to its working hours and maximum route duration
+        for vehicle_idx, vehicle in enumerate(vehicles):
+            time_dimension.CumulVar(routing.Start(vehicle_idx)).SetRange(
+                vehicle.time_window[0],
+                vehicle.time_window[1]
+            )
+            time_dimension.CumulVar(routing.End(vehicle_idx)).SetMax(
+                vehicle.time_window[1]
+            )
+            time_dimension.SetSpanUpperBoundForVehicle(max_route_duration, vehicle_idx)
+            time_dimension.SetSpanCostCoefficientForVehicle(100, vehicle_idx)
+
+        # Keep every stop of a group (e.g. one schedule) on the same vehicle
+        groups = {}
+        for node, stop in enumerate(stops, num_vehicles):
+            if stop.group is not None:
+                groups.setdefault(stop.group, []).append(manager.NodeToIndex(node))
+        for indices in groups.values():
+            for index in indices[1:]:
+                routing.solver().Add(
+                    routing.VehicleVar(indices[0]) == routing.VehicleVar(index)
+                )
+
+        # Configure how to search for a solution
+        search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+        search_parameters.first_solution_strategy = (
+            routing_enums_pb2.FirstSolutionStrategy.PARALLEL_CHEAPEST_INSERTION
+        )
+        search_parameters.local_search_metaheuristic = (
+            routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+        )
+        search_parameters.time_limit.seconds = 60
+
+        # Try to find optimal routes
+        solution = routing.SolveWithParameters(search_parameters)
+
+        if not solution:
+            return None
+
+        # Convert solution into usable format
+        return self._create_fleet_output(
+            manager,
+            routing,
+            solution,
+            vehicles,
+            stops,
+            distance_matrix,
+            start_time
+        )
+
     def _create_distance_matrix(
         self,
         locations: List[Dict[str, float]]
@@ -332,27 +665,29 @@ class RoutePathOptimizer:
         """
         # Convert locations to strings for Google Maps API
         origins = [f"{loc['lat']},{loc['lng']}" for loc in locations]
-        destinations = origins
-
-        # Get distance matrix from Google Maps
-        result = self.gmaps.distance_matrix(
-            origins,
-            destinations,
-            mode="driving",
-            departure_time="now"
-        )
 
         # Create empty matrices
         num_locations = len(locations)
         distance_matrix = [[0] * num_locations for _ in range(num_locations)]
         time_matrix = [[0] * num_locations for _ in range(num_locations)]
 
-        # Fill matrices with results from Google Maps
-        for i, row in enumerate(result['rows']):
-            for j, element in enumerate(row['elements']):
-                if element['status'] == 'OK':
-                    distance_matrix[i][j] = element['distance']['value']  # meters
-                    time_matrix[i][j] = element['duration']['value'] // 60  # minutes
+        # Google Maps caps each request at 100 elements, so fleet-sized
+        # problems are requested in blocks of MATRIX_BLOCK x MATRIX_BLOCK
+        for row_offset in range(0, num_locations, self.MATRIX_BLOCK):
+            for col_offset in range(0, num_locations, self.MATRIX_BLOCK):
+                result = self.gmaps.distance_matrix(
+                    origins[row_offset:row_offset + self.MATRIX_BLOCK],
+                    origins[col_offset:col_offset + self.MATRIX_BLOCK],
+                    mode="driving",
+                    departure_time="now"
+                )
+
+                # Fill matrices with results from Google Maps
+                for i, row in enumerate(result['rows'], row_offset):
+                    for j, element in enumerate(row['elements'], col_offset):
+                        if element['status'] == 'OK':
+                            distance_matrix[i][j] = element['distance']['value']  # meters
+                            time_matrix[i][j] = element['duration']['value'] // 60  # minutes
 
         return distance_matrix, time_matrix
 
@@ -417,6 +752,85 @@ class RoutePathOptimizer:
             'route': route
         }
 
+    def _create_fleet_output(
+        self,
+        manager,
+        routing,
+        solution,
+        vehicles: List[Vehicle],
+        stops: List[Stop],
+        distance_matrix: List[List[int]],
+        start_time: datetime
+    ) -> Dict:
+        """
+        Convert a fleet solution into one route per vehicle plus any dropped stops
+        """
+        num_vehicles = len(vehicles)
+        time_dimension = routing.GetDimensionOrDie('Time')
+        routes = []
+        served = set()
+
+        for vehicle_idx, vehicle in enumerate(vehicles):
+            route = []
+            total_distance = 0
+            index = routing.Start(vehicle_idx)
+
+            # Follow the vehicle's route stop by stop
+            while not routing.IsEnd(index):
+                node_index = manager.IndexToNode(index)
+                next_index = solution.Value(routing.NextVar(index))
+
+                if node_index >= num_vehicles:
+                    stop = stops[node_index - num_vehicles]
+                    arrival_time = solution.Min(time_dimension.CumulVar(index))
+                    served.add(node_index)
+
+                    route.append({
+                        'stop_id': stop.id,
+                        'group': stop.group,
+                        'location': stop.location,
+                        'arrival_time': (
+                            start_time + timedelta(minutes=arrival_time)
+                            if start_time else arrival_time
+                        ),
+                        'departure_time': (
+                            start_time + timedelta(minutes=arrival_time + stop.service_time)
+                            if start_time else arrival_time + stop.service_time
+                        ),
+                        'service_time': stop.service_time,
+                        'demand': stop.demand,
+                        'volume': stop.volume
+                    })
+
+                total_distance += distance_matrix[node_index][manager.IndexToNode(next_index)]
+                index = next_index
+
+            # Skip vehicles that stay at the depot all day
+            if not route:
+                continue
+
+            route_start = solution.Min(time_dimension.CumulVar(routing.Start(vehicle_idx)))
+            route_end = solution.Min(time_dimension.CumulVar(index))
+            routes.append({
+                'vehicle_id': vehicle.id,
+                'total_distance': total_distance,  # meters
+                'total_time': route_end - route_start,  # minutes
+                'route': route
+            })
+
+        # Anything not visited by a vehicle was dropped by the solver
+        dropped = [
+            stop.id for node, stop in enumerate(stops, num_vehicles)
+            if node not in served
+        ]
+
+        return {
+            'status': 'optimal' if not dropped else 'partial',
+            'total_distance': sum(route['total_distance'] for route in routes),
+            'routes': routes,
+            'dropped_stops': dropped
+        }
+
 
 # Class that combines mission optimization and route optimization
 class MissionScheduler:
@@ -425,52 +839,117 @@ class MissionScheduler:
         self.optimizer = MissionOptimizer()
         self.route_optimizer = RoutePathOptimizer()
 
-    def process_recurring_schedules(self):
+    def process_recurring_schedules(self, now: datetime = None) -> Dict:
         """
-        Process recurring mission schedules and create trips
+        Expand every due occurrence of the recurring mission schedules into trips
+
+        Occurrences missed since the last run are caught up. All trips are
+        bulk created and all next occurrences bulk updated in one transaction.
         """
         # Get current time
-        now = timezone.now()
+        now = now or timezone.now()
         
-        # Get all active schedules that need processing
-        schedules = MissionSchedule.objects.filter(
-            status='active',
+        # Get all live schedules that have an occurrence due, with everything
+        # a trip needs loaded up front
+        schedules = list(MissionSchedule.objects.filter(
+            status__in=['scheduled', 'in_progress'],
             next_occurrence__lte=now
+        ).select_related(
+            'reference_mission', 'vehicle'
+        ).prefetch_related('reference_mission__assigned_employees'))
+
+        # Occurrences materialized early (e.g. edited on the timeline) already have trips
+        earliest = min((schedule.next_occurrence for schedule in schedules), default=now)
+        existing_trips = set(
+            Trip.objects.filter(
+                reference_schedule__in=schedules,
+                schedule_occurrence__gte=earliest
+            ).values_list('reference_schedule_id', 'schedule_occurrence')
         )
-        
+
+        trips = []
+        updated_schedules = []
         for schedule in schedules:
-            # Create a new trip from this schedule
-            trip = Trip.objects.create(
-                reference_mission=schedule.reference_mission,
-                reference_schedule=schedule,
-                start_time=datetime.combine(now.date(), schedule.start_time),
-                end_time=datetime.combine(now.date(), schedule.end_time),
-                source=schedule.stop_points[0]['location'],
-                destination=schedule.stop_points[-1]['location'],
-                driver=schedule.vehicle.driver if hasattr(schedule.vehicle, 'driver') else '',
-                vehicle=schedule.vehicle,
-                staff=schedule.reference_mission.assigned_employees.all(),
-                passengers=schedule.reference_mission.assigned_employees.all(),
-                status='scheduled'
-            )
-            
-            # Update schedule's next occurrence based on frequency
-            if schedule.recurrence == 'daily':
-                schedule.next_occurrence = now + timedelta(days=1)
-            elif schedule.recurrence == 'weekly':
-                schedule.next_occurrence = now + timedelta(weeks=1)
-            elif schedule.recurrence == 'monthly':
-                schedule.next_occurrence = now + timedelta(days=30)
-            
-            schedule.save()
+            occurrences, next_occurrence = due_occurrences(schedule, now)
+
+            for occurrence in occurrences:
+                # Create a new trip for each occurrence of this schedule
+                if (schedule.id, occurrence) not in existing_trips:
+                    trips.append(build_trip(schedule, occurrence))
+
+            # Move the schedule on to its next occurrence (None once it is done)
+            schedule.next_occurrence = next_occurrence
+            updated_schedules.append(schedule)
+
+        with transaction.atomic():
+            # A trip materialized since existing_trips was read is skipped, not a failure
+            Trip.objects.bulk_create(trips, ignore_conflicts=True)
+            MissionSchedule.objects.bulk_update(updated_schedules, ['next_occurrence'])
+            # Nor do they bump table versions, which cached timelines key on
+            bump_table_version(Trip)
+            bump_table_version(MissionSchedule)
+
+        # Bulk writes skip signals, so refresh the conflict index explicitly
+        conflict_index.invalidate([
+            resource
+            for instance in trips + updated_schedules
+            for resource in resources_for(instance)
+        ])
+
+        return {
+            'schedules': len(updated_schedules),
+            'trips': len(trips)
+        }
+
+    def schedule_missions(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        recurrence_type: str = None,
+        mission_ids: List[str] = None
+    ) -> Dict:
+        """
+        Optimize schedules for the given missions and mark them as recurring
+        """
+        # Get missions and available assets
+        missions = Mission.objects.filter(
+            id__in=mission_ids or [],
+            status='active'
+        )
+        available_assets = Asset.objects.filter(AVAILABLE_STATUS)
+
+        if not missions or not available_assets:
+            return {'error': 'No missions or available assets found'}
+
+        # Run optimization
+        result = self.optimizer.optimize_mission_schedules(
+            missions=missions,
+            available_assets=available_assets,
+            time_window_start=start_date,
+            time_window_end=end_date,
+            # The first occurrence of each recurring schedule is its optimized start
+            recurrence_type=recurrence_type
+        )
+
+        if result is None:
+            return {'error': 'No feasible solution found'}
+
+        return result
 
     def optimize_mission_route(
         self,
         mission: Mission,
-        schedule: MissionSchedule
+        schedule: MissionSchedule,
+        time_limit: int = 30,
+        warm_start: bool = True,
+        on_solution: Callable[[Dict], None] = None
     ) -> Dict:
         """
         Take a mission and its schedule and optimize the route between stops
+
+        The search runs for at most time_limit seconds. With warm_start the
+        schedule's current stop order seeds the search, and on_solution receives
+        every improving route found along the way.
         """
         # Convert mission stops into format route optimizer can use
         stops = []
@@ -501,19 +980,213 @@ class MissionScheduler:
             start_time=datetime.combine(
                 timezone.now().date(),
                 schedule.start_time
-            )
+            ),
+            time_limit=time_limit,
+            initial_route=self._current_stop_order(schedule) if warm_start else None,
+            on_solution=on_solution
         )
 
         # If route found, update schedule
         if optimized_route:
-            schedule.stop_points = [stop for stop in optimized_route['route']]
+            schedule.stop_points = [
+                {
+                    **stop,
+                    'id': stop['stop_id'],
+                    'arrival_time': stop['arrival_time'].isoformat(),
+                    'departure_time': stop['departure_time'].isoformat()
+                }
+                for stop in optimized_route['route']
+            ]
             schedule.estimated_duration = str(
                 timedelta(minutes=optimized_route['total_time'])
             )
-            schedule.save()
+            schedule.last_updated = timezone.now()
+            schedule.save(update_fields=['stop_points', 'estimated_duration', 'last_updated', 'updated_at'])
 
         return optimized_route
 
+    def publish_route_progress(self, schedule_id: str) -> Callable[[Dict], None]:
+        """
+        Build an on_solution callback that streams improving routes to the
+        schedule's route optimization websocket group
+        """
+        channel_layer = get_channel_layer()
+        group_name = f"route_optimization_{schedule_id}"
+
+        def publish(progress: Dict):
+            try:
+                async_to_sync(channel_layer.group_send)(
+                    group_name,
+                    {
+                        'type': 'send_route_progress',
+                        'message': {'schedule_id': schedule_id, **progress}
+                    }
+                )
+            except Exception as e:
+                logger.warning("failed to broadcast route progress via websocket: %s", e)
+
+        return publish
+
+    def _current_stop_order(self, schedule: MissionSchedule) -> List[str]:
+        """
+        Get the ids of the schedule's stops in their current order
+        """
+        return [
+            str(stop_point.get('stop_id', stop_point.get('id', '')))
+            for stop_point in schedule.stop_points or []
+        ]
+
+    def optimize_fleet_routes(
+        self,
+        date,
+        schedule_ids: List[str] = None
+    ) -> Dict:
+        """
+        Route every schedule for a day across the whole available fleet in one solve
+        and write the per-vehicle routes back to the schedules in bulk
+
+        Schedules with stops no vehicle could serve are left unchanged and
+        listed under `unserved_stops`.
+        """
+        # Get the day's schedules (or the requested ones) with their missions
+        schedules = MissionSchedule.objects.select_related('reference_mission')
+        if schedule_ids:
+            schedules = schedules.filter(id__in=schedule_ids)
+        else:
+            # Recurring schedules by their next run, one-time ones by their own date
+            schedules = schedules.filter(
+                Q(next_occurrence__date=date) | Q(next_occurrence__isnull=True, scheduled_date=date),
+                status='scheduled'
+            )
+        schedules = {schedule.id: schedule for schedule in schedules}
+
+        # Only vehicles with a known depot and capacities can be routed
+        assets = Asset.objects.filter(
+            AVAILABLE_STATUS,
+            location__isnull=False,
+            capacity_weight__isnull=False,
+            capacity_volume__isnull=False
+        )
+        vehicles = [
+            Vehicle(
+                id=str(asset.id),
+                depot={
+                    'lat': float(asset.location['lat']),
+                    'lng': float(asset.location['lng'])
+                },
+                capacity_weight=asset.capacity_weight,
+                capacity_volume=asset.capacity_volume
+            )
+            for asset in assets
+        ]
+
+        if not schedules or not vehicles:
+            return {'error': 'No schedules or available vehicles found'}
+
+        # Convert every schedule's stops into one shared list of fleet stops
+        stops = []
+        stop_ids = {}  # each schedule's stop ids, to spot the ones left unserved
+        for schedule in schedules.values():
+            stop_points = schedule.stop_points or schedule.reference_mission.stop_points or []
+            stop_ids[schedule.id] = [str(stop_point.get('id', '')) for stop_point in stop_points]
+            for stop_point in stop_points:
+                stops.append(Stop(
+                    id=str(stop_point.get('id', '')),
+                    location=stop_point.get('location', {}),
+                    time_window=(
+                        self._convert_time_to_minutes(schedule.start_time),
+                        self._convert_time_to_minutes(schedule.end_time)
+                    ),
+                    service_time=30,  # Default 30 minutes at each stop
+                    demand=stop_point.get('demand', 0),
+                    volume=stop_point.get('volume', 0),
+                    group=schedule.id
+                ))
+
+        # Find optimal routes for the whole fleet
+        result = self.route_optimizer.optimize_fleet_routes(
+            vehicles=vehicles,
+            stops=stops,
+            max_route_duration=480,  # 8 hours
+            start_time=datetime.combine(date, datetime.min.time())
+        )
+
+        if not result:
+            return {'error': 'No feasible fleet routing found'}
+
+        # Vehicles the schedules held before routing, for the conflict index
+        previous_resources = [
+            resource for schedule in schedules.values() for resource in resources_for(schedule)
+        ]
+
+        # Split each vehicle's route back into the schedules it serves
+        routed = {}
+        for vehicle_route in result['routes']:
+            for stop in vehicle_route['route']:
+                vehicle_id, stop_points = routed.setdefault(stop['group'], (vehicle_route['vehicle_id'], []))
+                stop_points.append({
+                    **stop,
+                    'id': stop['stop_id'],
+                    'arrival_time': stop['arrival_time'].isoformat(),
+                    'departure_time': stop['departure_time'].isoformat()
+                })
+
+        # Only rewrite schedules whose every stop was served; a partly served
+        # schedule keeps its stops and is reported instead of losing them
+        updated = {}
+        unserved = {}
+        for schedule_id, schedule in schedules.items():
+            if not stop_ids[schedule_id]:
+                continue  # nothing to route
+            vehicle_id, stop_points = routed.get(schedule_id, (None, []))
+            served_ids = {str(stop_point['id']) for stop_point in stop_points}
+            missing = [stop_id for stop_id in stop_ids[schedule_id] if stop_id not in served_ids]
+            if missing:
+                unserved[schedule_id] = missing
+                continue
+            schedule.vehicle_id = vehicle_id
+            schedule.stop_points = stop_points
+            updated[schedule_id] = schedule
+
+        for schedule in updated.values():
+            first_arrival = datetime.fromisoformat(schedule.stop_points[0]['arrival_time'])
+            last_departure = datetime.fromisoformat(schedule.stop_points[-1]['departure_time'])
+            schedule.estimated_duration = str(last_departure - first_arrival)
+            schedule.total_stops = len(schedule.stop_points)
+
+        # Write all routed schedules back in one transaction
+        with transaction.atomic():
+            MissionSchedule.objects.bulk_update(
+                updated.values(),
+                ['vehicle', 'stop_points', 'estimated_duration', 'total_stops']
+            )
+            # Nor do they bump table versions, which cached timelines key on
+            bump_table_version(MissionSchedule)
+
+        # Bulk writes skip signals, so refresh the conflict index explicitly
+        conflict_index.invalidate(previous_resources + [
+            resource for schedule in updated.values() for resource in resources_for(schedule)
+        ])
+
+        return {
+            'status': result['status'],
+            'total_distance': result['total_distance'],
+            'routes': [
+                {
+                    'vehicle_id': vehicle_route['vehicle_id'],
+                    'total_distance': vehicle_route['total_distance'],
+                    'total_time': vehicle_route['total_time'],
+                    'schedule_ids': list(dict.fromkeys(
+                        stop['group'] for stop in vehicle_route['route']
+                    ))
+                }
+                for vehicle_route in result['routes']
+            ],
+            'dropped_stops': result['dropped_stops'],
+            # Schedules left as they were, with the stops no vehicle could serve
+            'unserved_stops': unserved
+        }
+
     def _convert_time_to_minutes(self, time_obj) -> int:
         """
         Convert time to minutes since start of day
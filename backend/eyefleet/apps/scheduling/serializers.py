@@ -4,6 +4,7 @@ from eyefleet.apps.scheduling.models.clients import Client
 from eyefleet.apps.scheduling.models.missions import Mission, MissionAssignedEmployee
 from eyefleet.apps.scheduling.models.pilots import Pilot
 from eyefleet.apps.scheduling.models.schedules import MissionSchedule, Trip
+from eyefleet.apps.scheduling.models.jobs import OptimizationJob
 
 class CargoSerializer(serializers.ModelSerializer):
     class Meta:
@@ -39,3 +40,28 @@ class TripSerializer(serializers.ModelSerializer):
     class Meta:
         model = Trip
         fields = '__all__'
+
+class OptimizationJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OptimizationJob
+        fields = '__all__'
+
+class TimelineEntrySerializer(serializers.Serializer):
+    """One occurrence of a recurring schedule, computed or materialized as a trip"""
+    schedule_id = serializers.CharField()
+    mission_id = serializers.CharField()
+    occurrence = serializers.DateTimeField()
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    vehicle_id = serializers.CharField(allow_null=True)
+    driver = serializers.CharField(allow_null=True)
+    status = serializers.CharField()
+    trip_id = serializers.UUIDField(allow_null=True)
+    materialized = serializers.BooleanField()
+
+class BookingSerializer(serializers.Serializer):
+    """A period a trip or schedule holds a vehicle or driver"""
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    kind = serializers.CharField()
+    object_id = serializers.CharField()
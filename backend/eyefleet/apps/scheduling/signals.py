@@ -0,0 +1,26 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models.schedules import MissionSchedule, Trip
+from .conflicts import conflict_index, resources_for
+
+
+@receiver(pre_save, sender=Trip)
+@receiver(pre_save, sender=MissionSchedule)
+def remember_booked_resources(sender, instance, **kwargs):
+    """Note the vehicle and driver before an edit so both old and new get re-indexed"""
+    previous = sender.objects.filter(pk=instance.pk).only('vehicle', 'driver').first() if instance.pk else None
+    instance._conflict_previous_resources = resources_for(previous) if previous else []
+
+
+@receiver(post_save, sender=Trip)
+@receiver(post_save, sender=MissionSchedule)
+def reindex_booking(sender, instance, using=None, **kwargs):
+    conflict_index.refresh(instance, getattr(instance, '_conflict_previous_resources', []), using)
+
+
+@receiver(post_delete, sender=Trip)
+@receiver(post_delete, sender=MissionSchedule)
+def unindex_booking(sender, instance, using=None, **kwargs):
+    instance._conflict_deleted = True
+    conflict_index.refresh(instance, resources_for(instance), using)
@@ -1,7 +1,12 @@
 from celery import shared_task
 from .scheduler import MissionScheduler
+from .jobs import run_job
 
 @shared_task
 def process_recurring_schedules():
     scheduler = MissionScheduler()
-    scheduler.process_recurring_schedules()
\ No newline at end of file
+    return scheduler.process_recurring_schedules()
+
+@shared_task
+def run_optimization_job(job_id):
+    run_job(job_id)
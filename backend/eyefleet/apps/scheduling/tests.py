@@ -0,0 +1,126 @@
+from datetime import datetime, time, timezone
+from unittest import mock
+
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase
+from ortools.constraint_solver import pywrapcp
+
+from eyefleet.apps.scheduling.jobs import problem_hash
+from eyefleet.apps.scheduling.models import Cargo, Mission, MissionSchedule, Trip
+from eyefleet.apps.scheduling.recurrence import build_trip
+from eyefleet.apps.scheduling.scheduler import RoutePathOptimizer, Stop
+
+
+class MaterializeTests(TestCase):
+    occurrence = datetime(2030, 1, 1, 8, tzinfo=timezone.utc)
+
+    def setUp(self):
+        mission = Mission.objects.create(id='M-1', mission_number='M-1', status='pending', priority='low')
+        self.schedule = MissionSchedule.objects.create(
+            id='S-1', shift='morning', reference_mission=mission, status='scheduled',
+            start_time=time(8), end_time=time(12), deliveries=1, estimated_duration='4h',
+            recurrence='daily', next_occurrence=self.occurrence,
+            stop_points=[{'location': 'Depot'}, {'location': 'Store'}]
+        )
+        self.url = f'/api/scheduling/mission-schedules/{self.schedule.id}/materialize/'
+
+    def test_materializing_twice_keeps_one_trip(self):
+        first = self.client.post(self.url, {'occurrence': self.occurrence.isoformat()}, content_type='application/json')
+        second = self.client.post(
+            self.url, {'occurrence': self.occurrence.isoformat(), 'driver': 'Sam'}, content_type='application/json'
+        )
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.json()['id'], second.json()['id'])
+        trips = Trip.objects.filter(reference_schedule=self.schedule, schedule_occurrence=self.occurrence)
+        self.assertEqual(trips.count(), 1)
+        self.assertEqual(trips.get().driver, 'Sam')
+
+    def test_invalid_changes_leave_no_trip(self):
+        response = self.client.post(
+            self.url, {'occurrence': self.occurrence.isoformat(), 'progress': 500}, content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Trip.objects.filter(reference_schedule=self.schedule).exists())
+
+    def test_database_rejects_duplicate_occurrence_trips(self):
+        build_trip(self.schedule, self.occurrence).save()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            build_trip(self.schedule, self.occurrence).save()
+
+        # Trips outside any schedule occurrence aren't limited
+        for _ in range(2):
+            trip = build_trip(self.schedule, self.occurrence)
+            trip.schedule_occurrence = None
+            trip.save()
+
+
+class ProblemHashTests(TestCase):
+    parameters = {'mission_ids': ['M-1']}
+
+    def setUp(self):
+        self.mission = Mission.objects.create(id='M-1', mission_number='M-1', status='active', priority='low')
+        self.cargos = [
+            Cargo.objects.create(type='parcel', status='pending', priority='low', name=name, weight=10)
+            for name in ('first', 'second')
+        ]
+        self.mission.cargos.add(self.cargos[0])
+
+    def test_same_data_same_hash(self):
+        self.assertEqual(problem_hash('schedule', self.parameters), problem_hash('schedule', self.parameters))
+
+    def test_cargo_change_changes_hash(self):
+        before = problem_hash('schedule', self.parameters)
+        self.cargos[0].weight = 500
+        self.cargos[0].save()
+        self.assertNotEqual(problem_hash('schedule', self.parameters), before)
+
+    def test_swapped_cargo_link_changes_hash(self):
+        before = problem_hash('schedule', self.parameters)
+        # Same number of links, different cargo
+        self.mission.cargos.remove(self.cargos[0])
+        self.mission.cargos.add(self.cargos[1])
+        self.assertNotEqual(problem_hash('schedule', self.parameters), before)
+
+
+class OptimizeRouteBudgetTests(SimpleTestCase):
+    stops = [
+        Stop(id=str(number), location={'lat': 0, 'lng': number}, time_window=(0, 480), service_time=0, demand=1)
+        for number in range(1, 4)
+    ]
+
+    def optimize(self, warm_start_seconds):
+        optimizer = RoutePathOptimizer()
+        clock = {'now': 1000.0}
+        limits = []
+        solve = pywrapcp.RoutingModel.SolveWithParameters
+
+        def failed_warm_start(routing, assignment, parameters):
+            clock['now'] += warm_start_seconds
+            return None
+
+        def fallback(routing, parameters):
+            limits.append(parameters.time_limit.ToMilliseconds())
+            return solve(routing, parameters)
+
+        matrix = [[0 if i == j else 10 for j in range(4)] for i in range(4)]
+        with mock.patch.object(optimizer, '_create_distance_matrix', return_value=(matrix, matrix)), \
+                mock.patch('eyefleet.apps.scheduling.scheduler.time.monotonic', side_effect=lambda: clock['now']), \
+                mock.patch.object(pywrapcp.RoutingModel, 'SolveFromAssignmentWithParameters', failed_warm_start), \
+                mock.patch.object(pywrapcp.RoutingModel, 'SolveWithParameters', fallback):
+            route = optimizer.optimize_route(
+                {'lat': 0, 'lng': 0}, self.stops, vehicle_capacity=10, time_limit=30, initial_route=['3', '2', '1']
+            )
+        return route, limits
+
+    def test_fallback_gets_only_the_remaining_budget(self):
+        route, limits = self.optimize(warm_start_seconds=29)
+        self.assertEqual(limits, [1000])
+        self.assertIsNotNone(route)
+
+    def test_no_fallback_once_the_budget_is_spent(self):
+        route, limits = self.optimize(warm_start_seconds=30)
+        self.assertEqual(limits, [])
+        self.assertIsNone(route)
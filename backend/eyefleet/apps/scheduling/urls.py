@@ -6,6 +6,7 @@ from eyefleet.apps.scheduling.viewsets import (
     MissionScheduleViewSet,
     TripViewSet,
     CargoViewSet, 
+    OptimizationJobViewSet,
     AgentViewSet
 )
 
@@ -17,6 +18,7 @@ router.register(r'mission-assigned-employees', MissionAssignedEmployeeViewSet)
 router.register(r'mission-schedules', MissionScheduleViewSet)
 router.register(r'trips', TripViewSet)
 router.register(r'cargos', CargoViewSet)
+router.register(r'optimization-jobs', OptimizationJobViewSet)
 router.register(r'agent', AgentViewSet, basename='agent')
 urlpatterns = [
     path('', include(router.urls)),
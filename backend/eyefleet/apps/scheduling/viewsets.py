@@ -1,29 +1,143 @@
-from rest_framework import viewsets, status, filters
+from rest_framework import viewsets, status, filters, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from eyefleet.apps.scheduling.models import (
     Mission,
     MissionAssignedEmployee,
     MissionSchedule,
     Trip,
-    Cargo
+    Cargo,
+    OptimizationJob
 )
 from eyefleet.apps.scheduling.serializers import (
     MissionSerializer,
     MissionAssignedEmployeeSerializer,
     MissionScheduleSerializer,
     TripSerializer,
-    CargoSerializer
+    CargoSerializer,
+    OptimizationJobSerializer,
+    TimelineEntrySerializer,
+    BookingSerializer
 )
 from eyefleet.apps.scheduling.agents.server import SchedulingAIService
 from eyefleet.apps.maintenance.models import Asset
-from datetime import datetime
-from eyefleet.apps.scheduling.scheduler import MissionOptimizer, MissionScheduler
+from datetime import datetime, timedelta
+from itertools import islice
+import hashlib
+import json
+from django.core.cache import cache
+from eyefleet.apps.scheduling.scheduler import MissionScheduler
+from eyefleet.apps.scheduling.jobs import submit_job
+from eyefleet.apps.scheduling.recurrence import occurrences_between, timeline, trip_fields
+from eyefleet.apps.scheduling.conflicts import conflict_index, resources_for
+from eyefleet.apps.core.mixins import BulkActionsMixin, ExportMixin, QueryPlanMixin, SparseFieldsMixin
+from eyefleet.apps.core.routers import use_replica
+from eyefleet.apps.core.versions import table_version
 
-class MissionViewSet(viewsets.ModelViewSet):
+def parse_datetime(value):
+    """Parse an ISO datetime from a request, assuming the server timezone if naive"""
+    moment = datetime.fromisoformat(value)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+def parse_bool(value):
+    """Parse a boolean flag from JSON, form or query data ('false', '0', 'no', ...)"""
+    try:
+        return serializers.BooleanField().to_internal_value(value)
+    except serializers.ValidationError:
+        raise ValueError(f'{value!r} is not a valid boolean')
+
+
+class BookingConflictsMixin:
+    """Vehicle and driver double-booking checks for trips and schedules"""
+
+    @action(detail=False, methods=['get', 'post'])
+    def conflicts(self, request):
+        """Check vehicle and driver bookings
+
+        GET: who holds each `vehicle`/`driver` (repeatable) between `start`
+        and `end`. POST: the bookings a proposed create or edit would clash
+        with; the body is the trip or schedule, with `id` when editing.
+        """
+        try:
+            if request.method == 'GET':
+                return self._busy(request)
+            return self._edit_conflicts(request)
+        except (TypeError, ValueError) as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    def _busy(self, request):
+        start = parse_datetime(request.query_params.get('start'))
+        end = parse_datetime(request.query_params.get('end'))
+        resources = [
+            ('vehicle', value) for value in request.query_params.getlist('vehicle')
+        ] + [
+            ('driver', value) for value in request.query_params.getlist('driver')
+        ]
+        if not resources:
+            raise ValueError('Pass at least one vehicle or driver')
+
+        return Response([
+            {
+                'resource_type': kind,
+                'resource': value,
+                'bookings': BookingSerializer(
+                    conflict_index.busy((kind, value), start, end), many=True
+                ).data
+            }
+            for kind, value in resources
+        ])
+
+    def _edit_conflicts(self, request):
+        instance_id = request.data.get('id')
+        instance = self.get_queryset().filter(pk=instance_id).first() if instance_id else None
+
+        serializer = self.get_serializer(instance, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+
+        # Apply the edit to an unsaved copy; nothing is written
+        candidate = instance or self.get_queryset().model()
+        for field, value in serializer.validated_data.items():
+            if not candidate._meta.get_field(field).many_to_many:
+                setattr(candidate, field, value)
+
+        conflicts = conflict_index.conflicts(candidate)
+        return Response({
+            'has_conflicts': bool(conflicts),
+            'conflicts': [
+                {
+                    'resource_type': kind,
+                    'resource': value,
+                    'bookings': BookingSerializer(bookings, many=True).data
+                }
+                for (kind, value), bookings in conflicts.items()
+            ]
+        })
+
+    def before_bulk_update(self, instances):
+        # Remember the old vehicle and driver, as the pre_save signal would
+        for instance in instances:
+            instance._conflict_previous_resources = resources_for(instance)
+
+    def after_bulk_write(self, instances):
+        # Bulk writes skip the signals that keep the conflict index current
+        super().after_bulk_write(instances)
+        resources = set()
+        for instance in instances:
+            resources.update(resources_for(instance))
+            resources.update(getattr(instance, '_conflict_previous_resources', []))
+        conflict_index.invalidate(resources)
+
+
+class MissionViewSet(BulkActionsMixin, QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Mission.objects.all()
     serializer_class = MissionSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
@@ -33,101 +147,119 @@ class MissionViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def optimize_schedules(self, request):
-        """Optimize mission schedules based on available assets"""
+        """Queue an optimization of mission schedules based on available assets"""
         try:
-            # Get parameters from request
+            # Validate parameters before queueing the job
             start_date = datetime.fromisoformat(request.data.get('start_date'))
             end_date = datetime.fromisoformat(request.data.get('end_date'))
             mission_ids = request.data.get('mission_ids', [])
-            
-            # Get missions and available assets
-            missions = Mission.objects.filter(
-                id__in=mission_ids,
-                status='active'
-            )
-            available_assets = Asset.objects.filter(
-                status='available'
+
+            job = submit_job('optimize_schedules', {
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat(),
+                'mission_ids': sorted(mission_ids)
+            })
+            return Response(
+                OptimizationJobSerializer(job).data,
+                status=status.HTTP_202_ACCEPTED
             )
-            
-            if not missions or not available_assets:
-                return Response(
-                    {'error': 'No missions or available assets found'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Run optimization
-            optimizer = MissionOptimizer()
-            result = optimizer.optimize_mission_schedules(
-                missions=missions,
-                available_assets=available_assets,
-                time_window_start=start_date,
-                time_window_end=end_date
+        except (TypeError, ValueError) as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            
-            if result is None:
-                return Response(
-                    {'error': 'No feasible solution found'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            return Response(result, status=status.HTTP_200_OK)
         except Exception as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        
+
     @action(detail=False, methods=['post'])
     def create_schedule(self, request):
-        """Create new schedule for missions"""
+        """Queue creation of new schedules for missions"""
         try:
             start_date = datetime.fromisoformat(request.data.get('start_date'))
             end_date = datetime.fromisoformat(request.data.get('end_date'))
             recurrence_type = request.data.get('recurrence_type')
             mission_ids = request.data.get('mission_ids', [])
 
-            scheduler = MissionScheduler()
-            result = scheduler.schedule_missions(
-                start_date=start_date,
-                end_date=end_date,
-                recurrence_type=recurrence_type,
-                mission_ids=mission_ids
+            job = submit_job('create_schedule', {
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat(),
+                'recurrence_type': recurrence_type,
+                'mission_ids': sorted(mission_ids)
+            })
+            return Response(
+                OptimizationJobSerializer(job).data,
+                status=status.HTTP_202_ACCEPTED
+            )
+        except (TypeError, ValueError) as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
             )
-
-            if 'error' in result:
-                return Response(
-                    {'error': result['error']},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            return Response(result, status=status.HTTP_201_CREATED)
-
         except Exception as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    
+
     @action(detail=True, methods=['post'])
     def optimize_route(self, request, pk=None):
-        """Optimize route for a specific schedule"""
-        try:
-            schedule = self.get_object()
-            scheduler = MissionScheduler()
-            
-            result = scheduler.optimize_mission_route(
-                mission=schedule.reference_mission,
-                schedule=schedule
-            )
+        """Queue a route optimization for a specific schedule
 
-            if not result:
+        Accepts an optional `time_limit` (seconds) search budget and a
+        `warm_start` flag (default true) to seed the search with the schedule's
+        current stop order. Improving routes are streamed to
+        ws/scheduling/route-optimization/<schedule_id>/ while the search runs.
+        """
+        try:
+            if not MissionSchedule.objects.filter(pk=pk).exists():
                 return Response(
-                    {'error': 'Could not optimize route'},
-                    status=status.HTTP_400_BAD_REQUEST
+                    {'error': 'Schedule not found'},
+                    status=status.HTTP_404_NOT_FOUND
                 )
 
-            return Response(result, status=status.HTTP_200_OK)
+            job = submit_job('optimize_route', {
+                'schedule_id': pk,
+                'time_limit': int(request.data.get('time_limit', 30)),
+                'warm_start': parse_bool(request.data.get('warm_start', True))
+            })
+            return Response(
+                OptimizationJobSerializer(job).data,
+                status=status.HTTP_202_ACCEPTED
+            )
+        except (TypeError, ValueError) as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['post'])
+    def optimize_fleet(self, request):
+        """Queue route optimization for a whole day's schedules across the available fleet"""
+        try:
+            date = datetime.fromisoformat(request.data.get('date')).date()
+            schedule_ids = request.data.get('schedule_ids', [])
 
+            job = submit_job('optimize_fleet', {
+                'date': date.isoformat(),
+                'schedule_ids': sorted(schedule_ids)
+            })
+            return Response(
+                OptimizationJobSerializer(job).data,
+                status=status.HTTP_202_ACCEPTED
+            )
+        except (TypeError, ValueError) as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
             return Response(
                 {'error': str(e)},
@@ -139,33 +271,159 @@ class MissionViewSet(viewsets.ModelViewSet):
         """Process all recurring schedules"""
         try:
             scheduler = MissionScheduler()
-            scheduler.process_recurring_schedules()
-            return Response({'status': 'success'}, status=status.HTTP_200_OK)
+            result = scheduler.process_recurring_schedules()
+            return Response({'status': 'success', **result}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-class MissionAssignedEmployeeViewSet(viewsets.ModelViewSet):
+class MissionAssignedEmployeeViewSet(QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = MissionAssignedEmployee.objects.all()
     serializer_class = MissionAssignedEmployeeSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['mission', 'role']
     search_fields = ['id']
 
-class MissionScheduleViewSet(viewsets.ModelViewSet):
+class MissionScheduleViewSet(BookingConflictsMixin, QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = MissionSchedule.objects.all()
     serializer_class = MissionScheduleSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     search_fields = ['id']
+    filterset_fields = ['reference_mission', 'vehicle', 'driver', 'status']
+
+    # Longest range the timeline computes in one request
+    MAX_TIMELINE_DAYS = 366
+    # How long a computed timeline page is cached server side (seconds)
+    TIMELINE_CACHE_TTL = 300
+
+    @action(detail=False, methods=['get'])
+    def timeline(self, request):
+        """Occurrences of recurring schedules between `start` and `end`
+
+        Occurrences are computed on the fly rather than stored as trips, so a
+        90-day calendar costs no rows in mission_logs. Occurrences already
+        materialized as trips are returned as those trips. Supports the usual
+        filters plus `page` and `page_size`; pages are cached until schedules
+        or trips change.
+        """
+        try:
+            start = parse_datetime(request.query_params.get('start'))
+            end = parse_datetime(request.query_params.get('end'))
+            if end < start or end - start > timedelta(days=self.MAX_TIMELINE_DAYS):
+                raise ValueError(f'end must be after start and within {self.MAX_TIMELINE_DAYS} days')
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = min(max(int(request.query_params.get('page_size', 100)), 1), 500)
+        except (TypeError, ValueError) as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-class TripViewSet(viewsets.ModelViewSet):
+        schedules = self.filter_queryset(self.get_queryset()).filter(
+            status__in=['scheduled', 'in_progress'],
+            next_occurrence__lte=end
+        )
+
+        # Any change to schedules or trips produces a new cache key
+        version = (table_version(MissionSchedule)[0], table_version(Trip)[0])
+        key = 'mission-timeline:' + hashlib.sha256(json.dumps(
+            [sorted(request.query_params.lists()), version],
+            default=str
+        ).encode()).hexdigest()
+
+        data = cache.get(key)
+        if data is None:
+            # Timeline pages are cached under table versions a lagging replica may not have reached
+            with use_replica(False):
+                schedules = list(schedules)
+                trips = {
+                    (trip.reference_schedule_id, trip.schedule_occurrence): trip
+                    for trip in Trip.objects.filter(
+                        reference_schedule__in=schedules,
+                        schedule_occurrence__range=(start, end)
+                    )
+                }
+
+                # Only compute as far as the requested page (plus one to know if there's more)
+                offset = (page - 1) * page_size
+                entries = list(islice(timeline(schedules, start, end, trips), offset, offset + page_size + 1))
+                data = {
+                    'start': start,
+                    'end': end,
+                    'page': page,
+                    'page_size': page_size,
+                    'has_next': len(entries) > page_size,
+                    'results': TimelineEntrySerializer(entries[:page_size], many=True).data
+                }
+            cache.set(key, data, self.TIMELINE_CACHE_TTL)
+
+        response = Response(data)
+        response['Cache-Control'] = 'private, max-age=60'
+        return response
+
+    @action(detail=True, methods=['post'])
+    def materialize(self, request, pk=None):
+        """Turn one computed occurrence into a real trip, optionally editing it
+
+        Expects `occurrence` (as returned by the timeline); any other trip
+        fields in the body are applied to the trip.
+        """
+        schedule = self.get_object()
+        try:
+            occurrence = parse_datetime(request.data.get('occurrence'))
+        except (TypeError, ValueError) as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if occurrence not in occurrences_between(schedule, occurrence, occurrence):
+            return Response(
+                {'error': 'Not an occurrence of this schedule'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        changes = {key: value for key, value in request.data.items() if key != 'occurrence'}
+        try:
+            # Invalid changes roll the new trip back too
+            with transaction.atomic():
+                # A concurrent request may create the same trip; the unique
+                # constraint stops it and get_or_create then reads its trip
+                trip, created = Trip.objects.get_or_create(
+                    reference_schedule=schedule,
+                    schedule_occurrence=occurrence,
+                    defaults=trip_fields(schedule, occurrence)
+                )
+                serializer = TripSerializer(trip, data=changes, partial=True)
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+        except IntegrityError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+
+class TripViewSet(BookingConflictsMixin, BulkActionsMixin, ExportMixin, QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Trip.objects.all()
     serializer_class = TripSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     search_fields = ['id']
 
-class CargoViewSet(viewsets.ModelViewSet):
+class OptimizationJobViewSet(QueryPlanMixin, SparseFieldsMixin, viewsets.ReadOnlyModelViewSet):
+    """Poll the status, progress and result of queued optimization jobs"""
+    queryset = OptimizationJob.objects.all()
+    serializer_class = OptimizationJobSerializer
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_fields = ['kind', 'status']
+    search_fields = ['id']
+
+class CargoViewSet(BulkActionsMixin, QueryPlanMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Cargo.objects.all()
     serializer_class = CargoSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
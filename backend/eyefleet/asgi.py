@@ -3,7 +3,8 @@ import django
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 from django.core.asgi import get_asgi_application
-from eyefleet.apps.livetracking.routing import websocket_urlpatterns
+from eyefleet.apps.livetracking.routing import websocket_urlpatterns as livetracking_websocket_urlpatterns
+from eyefleet.apps.scheduling.routing import websocket_urlpatterns as scheduling_websocket_urlpatterns
 from channels.security.websocket import AllowedHostsOriginValidator
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eyefleet.settings')
@@ -12,5 +13,7 @@ django.setup()
 
 application = ProtocolTypeRouter({
     "http": get_asgi_application(),
-    "websocket": AllowedHostsOriginValidator(AuthMiddlewareStack(URLRouter(websocket_urlpatterns))),
+    "websocket": AllowedHostsOriginValidator(AuthMiddlewareStack(URLRouter(
+        livetracking_websocket_urlpatterns + scheduling_websocket_urlpatterns
+    ))),
 })
@@ -21,6 +21,10 @@ app.conf.beat_schedule = {
         'task': 'eyefleet.apps.livetracking.tasks.update_telemetry_data.update_telemetry_dataset',
         'schedule': 300.0,  # Run every 5 minutes
     },
+    'process-recurring-schedules': {
+        'task': 'eyefleet.apps.scheduling.tasks.process_recurring_schedules',
+        'schedule': 900.0,  # Run every 15 minutes; missed occurrences are caught up
+    },
 }
 
 # Configure Celery workers
@@ -35,6 +35,7 @@ urlpatterns = [
     path('api/livetracking/', include('eyefleet.apps.livetracking.urls')),
     path('api/maintenance/', include('eyefleet.apps.maintenance.urls')),
     path('api/scheduling/', include('eyefleet.apps.scheduling.urls')),
+    path('api/core/', include('eyefleet.apps.core.urls')),
     path('docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ]
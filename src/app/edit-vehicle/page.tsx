@@ -48,7 +48,7 @@ export default function EditAsset() {
         if (!response.ok) {
           throw new Error('Failed to fetch asset details');
         }
-        const data = await response.json();
+        const data = (await response.json()).results;
         if (data && data.length > 0) {
           setFormData(data[0]); // Take the first matching asset
         } else {
@@ -107,7 +107,7 @@ export default function EditAsset() {
         if (!getResponse.ok) {
           throw new Error('Failed to find asset');
         }
-        const assets = await getResponse.json();
+        const assets = (await getResponse.json()).results;
         if (!assets || assets.length === 0) {
           throw new Error('Asset not found');
         }
@@ -18,6 +18,12 @@ interface Vehicle {
   mileage: string;
 }
 
+interface FleetStats {
+  total: number;
+  on_trip: number;
+  by_status: Record<string, number>;
+}
+
 const containerStyle = {
   width: '100%',
   height: '400px'
@@ -31,22 +37,37 @@ const center = {
 export default function MyFleet() {
   const router = useRouter();
   const [vehicles, setVehicles] = useState<Vehicle[]>([]);
+  const [stats, setStats] = useState<FleetStats | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
 
   // Fetch vehicles using the correct API endpoint
   useEffect(() => {
     fetchVehicles();
+    fetchStats();
   }, []);
 
+  // Fleet counts are aggregated server-side
+  const fetchStats = async () => {
+    try {
+      const response = await fetch('http://localhost:8000/api/core/dashboard/assets/');
+      if (response.ok) {
+        setStats(await response.json());
+      }
+    } catch (error) {
+      console.error('Error fetching fleet stats:', error);
+    }
+  };
+
   const fetchVehicles = async () => {
     try {
-      const response = await fetch('http://localhost:8000/api/maintenance/assets/');
+      const response = await fetch('http://localhost:8000/api/maintenance/assets/?page_size=1000');
       if (!response.ok) {
         throw new Error('Failed to fetch vehicles');
       }
+      // List endpoints are paginated: { next, previous, results }
       const data = await response.json();
-      setVehicles(data);
+      setVehicles(data.results);
       setLoading(false);
     } catch (error) {
       console.error('Error fetching vehicles:', error);
@@ -88,18 +109,18 @@ export default function MyFleet() {
       <div className="grid grid-cols-1 md:grid-cols-3 gap-6 mb-8">
         <div className="bg-white dark:bg-gray-800 rounded-lg shadow-lg p-6">
           <h2 className="text-xl font-semibold mb-2 text-gray-800 dark:text-white">Total Vehicles</h2>
-          <p className="text-3xl font-bold text-blue-600">{vehicles.length}</p>
+          <p className="text-3xl font-bold text-blue-600">{stats?.total ?? vehicles.length}</p>
         </div>
         <div className="bg-white dark:bg-gray-800 rounded-lg shadow-lg p-6">
           <h2 className="text-xl font-semibold mb-2 text-gray-800 dark:text-white">Active Vehicles</h2>
           <p className="text-3xl font-bold text-green-600">
-            {vehicles.filter(v => v.status === 'active').length}
+            {(stats?.by_status['Available'] ?? 0) + (stats?.by_status['On Route'] ?? 0)}
           </p>
         </div>
         <div className="bg-white dark:bg-gray-800 rounded-lg shadow-lg p-6">
           <h2 className="text-xl font-semibold mb-2 text-gray-800 dark:text-white">In Maintenance</h2>
           <p className="text-3xl font-bold text-yellow-600">
-            {vehicles.filter(v => v.status === 'maintenance').length}
+            {stats?.by_status['Maintenance'] ?? 0}
           </p>
         </div>
       </div>